@@ -0,0 +1,214 @@
+# Asynchronous driver for SIM800L module (using AT commands and uasyncio)
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# One reader task owns the serial stream and frames lines. Commands are
+# coroutines serialised by a lock, e.g. r = await phone.cmd('AT+CSQ').
+# Unsolicited result codes go to async handlers registered with on() or,
+# if there is no handler, to "async for line in phone".
+# Streams are passed in so that the driver also runs under CPython asyncio.
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+FINAL = (b'OK', b'ERROR')
+URCS = (b'RING', b'NO CARRIER', b'+CLIP', b'+CMTI', b'+CUSD', b'+CREG', b'*PSUTTZ', b'+CTZV')
+URC_QUEUE_LEN = 8
+PROMPT_TIMEOUT = 5000  # ms to wait for > prompt before message text is sent
+
+
+# "ignore" parameter to decode is not implemented
+def _str(line):
+    try:
+        return line.decode('utf-8')
+    except UnicodeError:
+        return bytes(c if c < 128 else ord('#') for c in line).decode('utf-8')
+
+# line is key or starts with key followed by : or a space
+def _is_urc(line, key):
+    n = len(key)
+    return line[:n] == key and (len(line) == n or line[n:n+1] == b':' or line[n:n+1] == b' ')
+
+
+class Reply:
+
+    def __init__(self, cmdstr, expect=None):
+        self.cmdstr = cmdstr
+        if isinstance(expect, str):
+            expect = expect.encode()
+        self.expect = expect    # prefix of line which completes command instead of OK
+        self.lines = []
+        self.result = None      # final result code, None if timed out
+        self.done = asyncio.Event()
+        self.prompt = asyncio.Event()
+
+    def response(self):
+        if self.lines:
+            return self.lines[0]
+        return self.result
+
+
+class SIM800L:
+
+    def __init__(self, reader, writer):
+        self._reader = reader   # stream with async read(n)
+        self._writer = writer   # stream with write() and async drain()
+        self._lock = asyncio.Lock()
+        self._reply = None
+        self._rx = b''
+        self._handlers = {}
+        self._urcs = []
+        self._urc_event = asyncio.Event()
+
+    @classmethod
+    def from_uart(cls, uartno, baud=9600):
+        import pyb
+        uart = pyb.UART(uartno, baud, read_buf_len=2048)
+        return cls(asyncio.StreamReader(uart), asyncio.StreamWriter(uart, {}))
+
+    # reader task, start with asyncio.create_task(phone.run())
+    async def run(self):
+        while True:
+            data = await self._reader.read(64)
+            if not data:    # end of stream
+                return
+            self._rx += data
+            while True:
+                i = self._rx.find(b'\n')
+                if i < 0:
+                    break
+                line = self._rx[:i].strip()
+                self._rx = self._rx[i+1:]
+                if line:
+                    self._line(line)
+            r = self._reply
+            if r and self._rx.strip() == b'>':     # prompt has no line end
+                self._rx = b''
+                r.prompt.set()
+
+    def _line(self, line):
+        r = self._reply
+        key = self._urc_key(line)
+        if key and not (r and key.decode() in r.cmdstr):
+            self._urc(key, line)
+        elif not r or r.done.is_set():
+            return
+        elif line[0:10] == b'+CME ERROR' or line[0:10] == b'+CMS ERROR':
+            self._finish(r, line)
+        elif r.expect:
+            if line.startswith(r.expect) or line == b'ERROR':
+                self._finish(r, line)
+            elif not line == b'OK':
+                r.lines.append(_str(line))
+        elif line in FINAL:
+            self._finish(r, line)
+        elif line == b'>':
+            r.prompt.set()
+        else:
+            r.lines.append(_str(line))
+
+    # key of handler or known URC for line, None if not a URC
+    def _urc_key(self, line):
+        for key in self._handlers:
+            if _is_urc(line, key):
+                return key
+        for key in URCS:
+            if _is_urc(line, key):
+                return key
+        return None
+
+    def _finish(self, r, line):
+        r.result = _str(line)
+        r.done.set()
+
+    def _urc(self, key, line):
+        if key in self._handlers:
+            asyncio.create_task(self._handlers[key](line))
+        else:
+            if len(self._urcs) >= URC_QUEUE_LEN:
+                self._urcs.pop(0)
+            self._urcs.append(line)
+            self._urc_event.set()
+
+    # handler is a coroutine function called with the line (bytes) of each URC
+    def on(self, prefix, handler):
+        self._handlers[prefix] = handler
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._urcs:
+            self._urc_event.clear()
+            await self._urc_event.wait()
+        return self._urcs.pop(0)
+
+    async def cmd(self, cmdstr, timeout=2000, msgtext=None, expect=None):
+        async with self._lock:
+            r = Reply(cmdstr, expect)
+            self._reply = r
+            try:
+                self._writer.write(cmdstr.encode() + b'\n')
+                await self._writer.drain()
+                if msgtext:
+                    try:
+                        await asyncio.wait_for(r.prompt.wait(), PROMPT_TIMEOUT/1000)
+                    except asyncio.TimeoutError:
+                        self._writer.write(b'\x1B')    # abandon message, a late prompt
+                        await self._writer.drain()     # would take commands as text
+                        return r
+                    self._writer.write(msgtext.encode() + b'\x1A')
+                    await self._writer.drain()
+                await asyncio.wait_for(r.done.wait(), timeout/1000)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._reply = None
+            return r
+
+    async def setup(self):
+        for c in ('ATE0', 'AT+CRSL=99', 'AT+CMIC=0,10', 'AT+CLIP=1', 'AT+CMGF=1',
+                  'AT+CALS=3,0', 'AT+CLTS=1', 'AT+CSCLK=0'):
+            await self.cmd(c)
+
+    async def signal_strength(self):
+        r = await self.cmd('AT+CSQ')
+        res = r.response()
+        if res and res[0:5] == '+CSQ:':
+            x = int(res[5:].split(',')[0])
+            if not x == 99:
+                return (x+3)//6
+        return 0
+
+    async def battery_charge(self):
+        r = await self.cmd('AT+CBC', 3000)
+        res = r.response()
+        if res and res[0:5] == '+CBC:':
+            return int(res.split(',')[1])
+        return 0
+
+    async def network_name(self):
+        r = await self.cmd('AT+COPS?')
+        res = r.response()
+        if res and res[0:6] == '+COPS:':
+            names = res.split('"')
+            if len(names) > 1:
+                return names[1]
+        return ''
+
+    async def date_time(self):
+        r = await self.cmd('AT+CCLK?')
+        res = r.response()
+        if res and res[0:5] == '+CCLK':
+            return res.split('"')[1]
+        return ''
+
+    # message reference number or None if sending failed
+    async def send_sms(self, destno, msgtext):
+        r = await self.cmd('AT+CMGS="{}"'.format(destno), 60000, msgtext)
+        if r.result == 'OK':
+            for ln in r.lines:
+                if ln[0:6] == '+CMGS:':
+                    return int(ln[6:])
+        return None
@@ -0,0 +1,97 @@
+# Recording of modem UART traffic and its replay on the host
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# Transcript lines are "<ms> <w|r> <hex bytes>", w written to and r read from
+# the modem. Record on the pyboard with
+#     phone._uart = atlog.Recorder(phone._uart)
+# and replay under CPython with pyb.connect(atlog.Replay('at.log')).
+
+import pyb
+import ubinascii
+
+LOG_FILE = 'at.log'
+
+class Recorder:
+
+    def __init__(self, uart, filename=LOG_FILE):
+        self._uart = uart
+        self._file = open(filename, 'w')
+        self._start = pyb.millis()
+
+    def _log(self, kind, data):
+        self._file.write('{} {} {}\n'.format(pyb.elapsed_millis(self._start), kind,
+                                             ubinascii.hexlify(data).decode()))
+
+    def init(self, *args, **kw):
+        self._uart.init(*args, **kw)
+
+    def any(self):
+        return self._uart.any()
+
+    def read(self, n=None):
+        data = self._uart.read() if n is None else self._uart.read(n)
+        if data:
+            self._log('r', data)
+        return data
+
+    def readinto(self, buf, n=None):
+        n = self._uart.readinto(buf) if n is None else self._uart.readinto(buf, n)
+        if n:
+            self._log('r', bytes(buf[:n]))
+        return n
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self._log('w', bytes(data))
+        return self._uart.write(data)
+
+    def close(self):
+        self._file.close()
+
+
+# device for the stand-in pyb.UART, bytes read after each write are released
+# with their recorded delay, or at once if realtime is False
+class Replay:
+
+    def __init__(self, filename=LOG_FILE, realtime=True):
+        self.realtime = realtime
+        self.commands = 0       # writes matched against transcript
+        self.mismatches = 0     # writes which differ from transcript
+        self._entries = []
+        with open(filename) as f:
+            for ln in f:
+                ms, kind, data = (ln.strip() + ' ').split(' ')[0:3]
+                self._entries.append([int(ms), kind, ubinascii.unhexlify(data)])
+        self._out = []          # [due ms, bytes]
+        self._release(0, 0)
+
+    # queue reads up to next write, due relative to time of entry i-1
+    def _release(self, i, since):
+        now = pyb.millis()
+        while i < len(self._entries) and self._entries[i][1] == 'r':
+            ms, kind, data = self._entries[i]
+            self._out.append([now + (ms - since if self.realtime else 0), data])
+            i += 1
+        self._next = i
+
+    def read(self):
+        now = pyb.millis()
+        data = b''
+        while self._out and self._out[0][0] <= now:
+            data += self._out.pop(0)[1]
+        return data
+
+    def write(self, data, baud):
+        i = self._next
+        if i >= len(self._entries):
+            self.mismatches += 1
+            return
+        ms, kind, expected = self._entries[i]
+        self.commands += 1
+        if not data == expected:
+            self.mismatches += 1
+        self._release(i + 1, ms)
+
+    def finished(self):
+        return self._next >= len(self._entries) and not self._out
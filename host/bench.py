@@ -0,0 +1,84 @@
+# Host benchmark of modem round trips and wall time for common phone operations
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/bench.py               run against FakeModem
+# python3 host/bench.py --fast        ... with latencies scaled to zero
+# python3 host/bench.py --replay at.log   replay a recorded session
+
+import os
+import sys
+import json
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import atlog
+import fakemodem
+
+URL = 'http://api.example.com/rates.json'
+
+def page():
+    rates = {'EUR': 1.1234, 'USD': 1.3312, 'CHF': 1.2901}
+    for i in range(150):
+        rates['X{:03d}'.format(i)] = i / 7
+    return json.dumps({'base': 'GBP', 'rates': rates})
+
+def modem(fast):
+    m = fakemodem.FakeModem()
+    if fast:
+        m.scale = 0
+    m.add_sms('+447700900001', 'Hello\nsee you at 8')
+    m.add_sms('+447700900002', 'Running late')
+    m.add_sms('+447700900003', 'OK')
+    m.add_page(URL, page())
+    return m
+
+# as phoneui.update() with all metrics due
+def update(phone):
+    phone.date_time()
+    return vars(phone.status(None, ('signal', 'battery', 'network')))
+
+def read_sms(phone):
+    return phone.read_sms(2)
+
+def inbox(phone):
+    phone.inbox.load()
+    return phone.inbox.read(1)
+
+def http_get(phone):
+    return phone.http_get(URL).extract(['rates.EUR'])
+
+def http_get_streamed(phone):
+    n = [0]
+    def count(chunk):
+        n[0] += len(chunk)
+    phone.http_get(URL, consumer=count)
+    return n[0]
+
+BENCHES = (update, read_sms, inbox, http_get, http_get_streamed)
+
+def main(args):
+    if '--replay' in args:
+        device = atlog.Replay(args[args.index('--replay') + 1], realtime=not '--fast' in args)
+    else:
+        device = modem('--fast' in args)
+    pyb.connect(device)
+    os.chdir(tempfile.mkdtemp())    # baud.txt is written to current directory
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    t = pyb.millis()
+    phone.setup()
+    print('{:20s} {:>6s} {:>8s}'.format('', 'cmds', 'ms'))
+    print('{:20s} {:6d} {:8d}   {} baud'.format('setup', device.commands, pyb.elapsed_millis(t), phone.baud))
+    for bench in BENCHES:
+        n = device.commands
+        t = pyb.millis()
+        res = bench(phone)
+        print('{:20s} {:6d} {:8d}   {}'.format(bench.__name__, device.commands - n, pyb.elapsed_millis(t), res))
+    if isinstance(device, atlog.Replay):
+        print('mismatches', device.mismatches)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
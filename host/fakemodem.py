@@ -0,0 +1,380 @@
+# Simulated SIM800L answering the AT commands used by sim800l.py
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# Connect to the stand-in pyb module with pyb.connect(FakeModem()) before
+# creating SIM800L. Replies become readable after the latency of the command
+# plus the time the bytes take on the wire at the modem baud rate.
+# AT+CIPSTART opens a real TCP connection from the host, so sockets can be
+# tested against a local server.
+
+import time
+import socket
+import pyb
+
+# ms before final result of each command, 'default' for the rest
+LATENCY = {
+    'default'    : 20,
+    '+COPS'      : 200,
+    '+CMGS'      : 2500,
+    '+CUSD'      : 3000,
+    '+SAPBR'     : 1000,
+    '+HTTPACTION': 1500,
+    '+CIICR'     : 500,
+    '+CIPSTART'  : 300,
+}
+
+# commands answered with OK
+SETTINGS = ('E0', 'E1', 'H', 'A', 'D', '+CRSL', '+CMIC', '+CLIP', '+CMGF', '+CALS', '+CLTS',
+            '+CSCLK', '+CREG', '+CLVL', '+CMUT', '+HTTPINIT', '+HTTPTERM', '+HTTPSSL',
+            '+CIPMUX', '+CSTT', '+CIICR', '+CIPSSL')
+
+
+class FakeModem:
+
+    def __init__(self, latency=None, baud=None, network='giffgaff', signal=17, battery=80):
+        self.latency = dict(LATENCY)
+        if latency:
+            self.latency.update(latency)
+        self.scale = 1.0        # multiplies latencies, 0 answers at once
+        self.baud = baud        # None is autobaud, set by first command
+        self.network = network
+        self.signal = signal    # AT+CSQ rssi 0..31
+        self.battery = battery
+        self.credit = '5.00'
+        self.sms = {}           # slot -> [status, number, date_time, text]
+        self.pages = {}         # url -> [status, body, headers]
+        self.sent = []          # [number, text] of messages sent
+        self.commands = 0       # command lines received
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._line = bytearray()
+        self._out = []          # [due ms, bytes]
+        self._wait = None       # [bytes wanted or None for ^Z, handler] for text after prompt
+        self._text = bytearray()
+        self._mr = 0
+        self._http = {}         # HTTPPARA values and uploaded DATA
+        self._status = 0
+        self._body = b''
+        self._headers = {}
+        self._bearer = False
+        self._sockets = {}      # id -> [socket or None when closed by server, bytes received]
+
+    def add_sms(self, number, text, status='REC UNREAD', slot=None):
+        if slot is None:
+            slot = 1
+            while slot in self.sms:
+                slot += 1
+        self.sms[slot] = [status, number, _now(), text]
+        return slot
+
+    def add_page(self, url, body, status=200, headers=None):
+        if isinstance(body, str):
+            body = body.encode()
+        self.pages[url] = [status, body, headers if headers else {}]
+
+    # unsolicited result codes
+    def ring(self, number):
+        self.urc('RING')
+        self.urc('+CLIP: "{}",145,"",0,"",0'.format(number))
+
+    def receive_sms(self, number, text):
+        slot = self.add_sms(number, text)
+        self.urc('+CMTI: "SM",{}'.format(slot))
+        return slot
+
+    # network drops GPRS bearer, HTTP requests fail until it is opened again
+    def drop_bearer(self):
+        self._bearer = False
+
+    def hangup(self):
+        self.urc('NO CARRIER')
+
+    def urc(self, line, delay=0):
+        self._send(_lines([line]), delay)
+
+    # pyb.UART side
+    def read(self):
+        self._poll_sockets()
+        now = pyb.millis()
+        data = b''
+        while self._out and self._out[0][0] <= now:
+            data += self._out.pop(0)[1]
+        return data
+
+    def write(self, data, baud):
+        if self.baud is None:
+            self.baud = baud
+        elif not baud == self.baud:
+            return          # framing errors, nothing understood
+        self.bytes_in += len(data)
+        for c in data:
+            if self._wait:
+                self._text_byte(c)
+            elif c == 0x0A or c == 0x0D:
+                if self._line:
+                    line = bytes(self._line).decode()
+                    self._line = bytearray()
+                    self._command(line.strip())
+            else:
+                self._line.append(c)
+
+    def _send(self, data, delay=0):
+        due = pyb.millis() + delay * self.scale + len(data) * 10000 / (self.baud or 9600)
+        self._out.append([due, data])
+        self._out.sort(key=lambda o: o[0])
+        self.bytes_out += len(data)
+
+    def _text_byte(self, c):
+        want, handler = self._wait
+        if want is None and c == 0x1B:      # ESC abandons message
+            self._wait = None
+            self._text = bytearray()
+            return
+        if want is None and c == 0x1A:
+            done = True
+        else:
+            self._text.append(c)
+            done = not want is None and len(self._text) >= want
+        if done:
+            text = bytes(self._text)
+            self._wait = None
+            self._text = bytearray()
+            handler(text)
+
+    def _command(self, line):
+        if not line.upper().startswith('AT'):
+            return
+        self.commands += 1
+        rest = line[2:]
+        if rest.upper().startswith('D'):    # dial string contains ;
+            parts = ['D']
+        else:
+            parts = [p for p in rest.split(';') if p] or ['']
+        out = []
+        delay = 0
+        for p in parts:
+            name = p
+            for sep in ('=', '?'):
+                if sep in name:
+                    name = name[:name.index(sep)]
+            args = p[len(name)+1:] if p[len(name):len(name)+1] == '=' else ''
+            delay = max(delay, self.latency.get(name, self.latency['default']))
+            fn = getattr(self, '_' + name[1:].lower(), None) if name[0:1] == '+' else None
+            if name == '' or name.upper() in SETTINGS:
+                continue
+            if not fn:
+                out.append('ERROR')
+                self._send(_lines(out), delay)
+                return
+            res = fn(args, p.endswith('?'))
+            if res is None:     # command answers itself
+                return
+            out.extend(res)
+        self._send(_lines(out + ['OK']), delay)
+
+    def _csq(self, args, query):
+        return ['+CSQ: {},0'.format(self.signal)]
+
+    def _cbc(self, args, query):
+        return ['+CBC: 0,{},{}'.format(self.battery, 3400 + self.battery*8)]
+
+    def _cops(self, args, query):
+        return ['+COPS: 0,0,"{}"'.format(self.network)]
+
+    def _cclk(self, args, query):
+        return ['+CCLK: "{}"'.format(_now())]
+
+    def _ipr(self, args, query):
+        self._send(_lines(['OK']))
+        self.baud = int(args)
+        return None
+
+    def _cmgr(self, args, query):
+        slot = int(args)
+        if not slot in self.sms:
+            return []
+        msg = self.sms[slot]
+        res = ['+CMGR: "{}","{}",""{}'.format(msg[0], msg[1], _date(msg))] + msg[3].split('\n')
+        if msg[0] == 'REC UNREAD':
+            msg[0] = 'REC READ'
+        return res
+
+    def _cmgl(self, args, query):
+        res = []
+        for slot in sorted(self.sms):
+            msg = self.sms[slot]
+            res.append('+CMGL: {},"{}","{}",""{}'.format(slot, msg[0], msg[1], _date(msg)))
+            res.extend(msg[3].split('\n'))
+        return res
+
+    def _cmgd(self, args, query):
+        self.sms.pop(int(args.split(',')[0]), None)
+        return []
+
+    def _cmgs(self, args, query):
+        number = args.strip('"')
+        self._send(b'\r\n> ')
+        self._wait = [None, lambda text: self._sms_sent(number, text)]
+        return None
+
+    def _sms_sent(self, number, text):
+        self._mr += 1
+        self.sent.append([number, text.decode()])
+        self._send(_lines(['+CMGS: {}'.format(self._mr), 'OK']), self.latency['+CMGS'])
+
+    def _cusd(self, args, query):
+        self.urc('+CUSD: 0,"Your balance is #{}. Thank you.",15'.format(self.credit), self.latency['+CUSD'])
+        return []
+
+    def _sapbr(self, args, query):
+        if args.startswith('2,'):
+            return ['+SAPBR: 1,{},"10.0.0.1"'.format(1 if self._bearer else 3)]
+        if args.startswith('1,') or args.startswith('0,'):
+            self._bearer = args[0] == '1'
+        return []
+
+    def _httppara(self, args, query):
+        name, value = args.split(',', 1)
+        self._http[name.strip('"')] = value.strip('"')
+        return []
+
+    def _httpdata(self, args, query):
+        n = int(args.split(',')[0])
+        self._send(_lines(['DOWNLOAD']))
+        self._wait = [n, self._http_data]
+        return None
+
+    def _http_data(self, data):
+        self._http['DATA'] = data
+        self._send(_lines(['OK']))
+
+    def _httpaction(self, args, query):
+        method = int(args)
+        url = self._http.get('URL', '')
+        page = self.pages.get(url) or self.pages.get('http://' + url) or self.pages.get('https://' + url)
+        if page:
+            status, body = page[0], page[1]
+            start, end = int(self._http.get('BREAK', 0)), int(self._http.get('BREAKEND', 0))
+            if start or end:
+                body = body[start:end+1] if end > start else body[start:]
+                status = 206
+        else:
+            status, body = 404, b''
+        if not self._bearer:
+            status, body = 601, b''     # network error
+        self._body = body if method == 0 or method == 1 else b''
+        self._status = status
+        self._headers = page[2] if page else {}
+        self._send(_lines(['OK']))
+        self.urc('+HTTPACTION: {},{},{}'.format(method, status, len(self._body)), self.latency['+HTTPACTION'])
+        return None
+
+    def _httphead(self, args, query):
+        head = 'HTTP/1.1 {} OK\r\n'.format(self._status)
+        for k, v in self._headers.items():
+            head += '{}: {}\r\n'.format(k, v)
+        self._raw('+HTTPHEAD', (head + '\r\n').encode())
+        return None
+
+    def _httpread(self, args, query):
+        if args:
+            offset, n = [int(a) for a in args.split(',')]
+            data = self._body[offset:offset+n]
+        else:
+            data = self._body
+        self._raw('+HTTPREAD', data)
+        return None
+
+    def _raw(self, prefix, data):
+        self._send(b'\r\n' + '{}: {}\r\n'.format(prefix, len(data)).encode() + data + b'\r\nOK\r\n',
+                   self.latency['default'])
+
+    def _cifsr(self, args, query):
+        self._send(_lines(['10.0.0.2']))   # address without OK
+        return None
+
+    def _cipstart(self, args, query):
+        id, proto, host, port = args.split(',')
+        try:
+            sock = socket.create_connection((host.strip('"'), int(port)), 5)
+            sock.setblocking(False)
+            self._sockets[int(id)] = [sock, bytearray()]
+            result = 'CONNECT OK'
+        except OSError:
+            result = 'CONNECT FAIL'
+        self._send(_lines(['OK']))
+        self.urc('{}, {}'.format(id, result), self.latency['+CIPSTART'])
+        return None
+
+    def _cipsend(self, args, query):
+        id, n = [int(a) for a in args.split(',')]
+        if not id in self._sockets or self._sockets[id][0] is None:
+            return self._error()
+        self._send(b'\r\n> ')
+        self._wait = [n, lambda data: self._tcp_sent(id, data)]
+        return None
+
+    def _tcp_sent(self, id, data):
+        self._sockets[id][0].sendall(data)
+        self._send(_lines(['{}, SEND OK'.format(id)]), self.latency['default'])
+
+    def _ciprxget(self, args, query):
+        params = [int(a) for a in args.split(',')]
+        if params[0] == 1:
+            return []
+        id, n = params[1], params[2]
+        if not id in self._sockets:
+            return self._error()
+        rx = self._sockets[id][1]
+        data = bytes(rx[:n])
+        del rx[:n]
+        self._send(b'\r\n' + '+CIPRXGET: 2,{},{},{}\r\n'.format(id, len(data), len(rx)).encode() +
+                   data + b'\r\nOK\r\n', self.latency.get('+CIPRXGET', self.latency['default']))
+        return None
+
+    def _cipclose(self, args, query):
+        id = int(args.split(',')[0])
+        if not id in self._sockets:
+            return self._error()
+        sock = self._sockets.pop(id)[0]
+        if sock:
+            sock.close()
+        self._send(_lines(['{}, CLOSE OK'.format(id)]))
+        return None
+
+    def _error(self):
+        self._send(_lines(['ERROR']))
+        return None
+
+    # data from a server is announced when none is waiting, as by the modem
+    def _poll_sockets(self):
+        for id, entry in list(self._sockets.items()):
+            sock, rx = entry
+            if sock is None:
+                continue
+            try:
+                data = sock.recv(4096)
+            except BlockingIOError:
+                continue
+            except OSError:
+                data = b''
+            if data:
+                if not rx:
+                    self.urc('+CIPRXGET: 1,{}'.format(id))
+                rx.extend(data)
+            else:
+                sock.close()
+                entry[0] = None
+                self.urc('{}, CLOSED'.format(id))
+
+
+def _lines(lines):
+    return b''.join([b'\r\n' + ln.encode() + b'\r\n' for ln in lines])
+
+# stored and sent messages have no timestamp, e.g. +CMGL: 9,"STO UNSENT","+44..","",
+def _date(msg):
+    return ',' if msg[0].startswith('STO') else ',"{}"'.format(msg[2])
+
+def _now():
+    t = time.localtime()
+    return '{:02d}/{:02d}/{:02d},{:02d}:{:02d}:{:02d}+00'.format(t[0] % 100, t[1], t[2], t[3], t[4], t[5])
@@ -0,0 +1,113 @@
+# Host benchmark of JsonPaths against json.loads on the currency and weather payloads
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/json_bench.py
+# Reports time per document and peak heap (tracemalloc) to extract the values
+# used by CurrencyApp and WeatherApp, with JsonPaths fed the whole body, fed
+# in HTTPREAD sized chunks, and with json.loads of the whole document.
+# CPython json is compiled C, so times favour json.loads more than on the
+# pyboard, peak heap is the comparison that carries over.
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import jsonpath
+import upyapps
+
+CURRENCY_PATHS = ['rates.EUR', 'rates.USD', 'rates.CHF']
+CHUNK = 512     # sim800l.HTTP_CHUNK
+
+# as returned by the exchangerate-api bulk request
+def currency():
+    rates = {'EUR': 1.1234, 'USD': 1.3312, 'CHF': 1.2901}
+    for i in range(160):
+        rates['{}{}{}'.format(chr(65 + i // 26 % 26), chr(65 + i % 26), 'X')] = 1 + i / 7
+    return json.dumps({'result': 'success', 'timestamp': 1508320516, 'from': 'GBP',
+                       'rates': rates}).encode()
+
+# as returned by the wunderground conditions/astronomy request
+def weather():
+    location = {'full': 'London, United Kingdom', 'city': 'London', 'state': '',
+                'state_name': 'United Kingdom', 'country': 'UK', 'country_iso3166': 'GB',
+                'zip': '00000', 'magic': '553', 'wmo': '03772', 'latitude': '51.47',
+                'longitude': '-0.46', 'elevation': '24.0'}
+    observation = {'image': {'url': 'http://icons.wxug.com/graphics/wu2/logo_130x80.png',
+                             'title': 'Weather Underground', 'link': 'http://www.wunderground.com'},
+                   'display_location': location, 'observation_location': dict(location),
+                   'estimated': {}, 'station_id': 'EGLL',
+                   'observation_time': 'Last Updated on October 18, 11:20 AM BST',
+                   'local_time_rfc822': 'Wed, 18 Oct 2017 11:35:16 +0100',
+                   'weather': 'Mostly Cloudy', 'temperature_string': '61 F (16 C)',
+                   'temp_f': 61, 'temp_c': 16, 'relative_humidity': '72%',
+                   'wind_string': 'From the SW at 12 MPH', 'wind_dir': 'SW', 'wind_degrees': 230,
+                   'wind_mph': 12, 'wind_gust_mph': 0, 'wind_kph': 19, 'pressure_mb': '1012',
+                   'pressure_in': '29.89', 'pressure_trend': '+', 'dewpoint_c': 11,
+                   'heat_index_string': 'NA', 'windchill_string': 'NA', 'feelslike_c': '16',
+                   'visibility_km': '10.0', 'solarradiation': '--', 'UV': '1', 'precip_today_metric': '0 mm',
+                   'icon': 'mostlycloudy', 'icon_url': 'http://icons.wxug.com/i/c/k/mostlycloudy.gif',
+                   'forecast_url': 'http://www.wunderground.com/global/stations/03772.html',
+                   'history_url': 'http://www.wunderground.com/history/airport/EGLL/2017/10/18/DailyHistory.html',
+                   'ob_url': 'http://www.wunderground.com/cgi-bin/findweather/getForecast?query=51.47,-0.46'}
+    moon = {'percentIlluminated': '3', 'ageOfMoon': '28', 'phaseofMoon': 'Waning Crescent',
+            'hemisphere': 'North', 'current_time': {'hour': '11', 'minute': '35'},
+            'sunrise': {'hour': '7', 'minute': '28'}, 'sunset': {'hour': '18', 'minute': '04'},
+            'moonrise': {'hour': '6', 'minute': '41'}, 'moonset': {'hour': '17', 'minute': '43'}}
+    response = {'version': '0.1', 'termsofService': 'http://www.wunderground.com/weather/api/d/terms.html',
+                'features': {'conditions': 1, 'astronomy': 1}}
+    return json.dumps({'response': response, 'current_observation': observation,
+                       'moon_phase': moon, 'sun_phase': {'sunrise': moon['sunrise'],
+                                                          'sunset': moon['sunset']}}, indent=1).encode()
+
+def paths_whole(body, paths):
+    return jsonpath.JsonPaths(paths).feed(body).values
+
+def paths_chunked(body, paths):
+    jp = jsonpath.JsonPaths(paths)
+    mv = memoryview(body)
+    for i in range(0, len(body), CHUNK):
+        jp.feed(mv[i:i+CHUNK])
+    return jp.values
+
+def loads(body, paths):
+    doc = json.loads(body)
+    values = {}
+    for p in paths:
+        v = doc
+        for k in p.split('.'):
+            v = v[int(k)] if isinstance(v, list) else v[k]
+        values[p] = v
+    return values
+
+METHODS = (paths_whole, paths_chunked, loads)
+
+def measure(fn, body, paths, n):
+    tracemalloc.start()
+    values = fn(body, paths)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    t = time.perf_counter()
+    for i in range(n):
+        fn(body, paths)
+    return values, (time.perf_counter() - t) * 1000 / n, peak
+
+def main(n=200):
+    print('{:10s} {:15s} {:>9s} {:>10s}'.format('', '', 'ms/doc', 'peak heap'))
+    for name, body, paths in (('currency', currency(), CURRENCY_PATHS),
+                              ('weather', weather(), upyapps.WEATHER_PATHS)):
+        expected = None
+        for fn in METHODS:
+            values, ms, peak = measure(fn, body, paths, n)
+            if expected is None:
+                expected = values
+            assert values == expected, (fn.__name__, values)
+            print('{:10s} {:15s} {:9.3f} {:10d}'.format(name, fn.__name__, ms, peak))
+        print('{:10s} {} bytes, {} values'.format('', len(body), len(expected)))
+
+if __name__ == '__main__':
+    main()
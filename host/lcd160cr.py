@@ -0,0 +1,27 @@
+# Stand-in lcd160cr module for running the user interface under CPython
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# Commands are not drawn, only counted in LCD160CR.commands.
+
+PORTRAIT = 0
+LANDSCAPE = 1
+
+class LCD160CR:
+
+    commands = 0
+
+    def __init__(self, connect=None):
+        self.touch = (0, 0, 0)
+
+    @staticmethod
+    def rgb(r, g, b):
+        return ((b & 0xf8) << 8) | ((g & 0xfc) << 3) | (r >> 3)
+
+    def get_touch(self):
+        LCD160CR.commands += 1
+        return self.touch
+
+    def __getattr__(self, name):
+        def command(*args):
+            LCD160CR.commands += 1
+        return command
@@ -0,0 +1,93 @@
+# Stand-in pyb module for running the phone driver under CPython
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# A UART is wired to the device given to connect(), e.g. a FakeModem or a
+# Replay, which has write(data, baud) and read() returning bytes ready now.
+
+import time
+
+_t0 = time.monotonic()
+_device = None
+
+def connect(device):
+    global _device
+    _device = device
+
+def millis():
+    return int((time.monotonic() - _t0) * 1000)
+
+def elapsed_millis(start):
+    return millis() - start
+
+def delay(ms):
+    time.sleep(ms / 1000)
+
+def udelay(us):
+    time.sleep(us / 1000000)
+
+
+class UART:
+
+    def __init__(self, uartno, baud=9600, **kw):
+        self.device = _device
+        self.baud = baud
+        self._rx = bytearray()
+
+    def init(self, baud, **kw):
+        self.baud = baud
+
+    def any(self):
+        self._rx.extend(self.device.read())
+        if not self._rx:
+            time.sleep(0.0005)  # main loop polls, do not spin the host
+        return len(self._rx)
+
+    def read(self, n=None):
+        self.any()
+        n = len(self._rx) if n is None else min(n, len(self._rx))
+        if not n:
+            return None
+        data = bytes(self._rx[:n])
+        del self._rx[:n]
+        return data
+
+    def readinto(self, buf, n=None):
+        data = self.read(len(buf) if n is None else n)
+        if not data:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        data = bytes(data)
+        self.device.write(data, self.baud)
+        return len(data)
+
+
+class RTC:
+
+    def __init__(self):
+        t = time.localtime()
+        self._dt = (t[0], t[1], t[2], t[6]+1, t[3], t[4], t[5], 0)
+
+    def datetime(self, dt=None):
+        if dt is None:
+            return self._dt
+        self._dt = tuple(dt)
+
+
+class LED:
+
+    def __init__(self, n):
+        self.n = n
+
+    def on(self):
+        pass
+
+    def off(self):
+        pass
+
+    def toggle(self):
+        pass
@@ -0,0 +1,161 @@
+# asim800l.py under CPython asyncio, streams connected to a FakeModem
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_asim800l.py
+
+import os
+import sys
+import asyncio
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import fakemodem
+import asim800l
+
+# read side of the modem serial line
+class Reader:
+
+    def __init__(self, modem):
+        self.modem = modem
+        self._rx = b''
+
+    async def read(self, n):
+        while not self._rx:
+            self._rx = self.modem.read()
+            if not self._rx:
+                await asyncio.sleep(0.001)
+        data = self._rx[:n]
+        self._rx = self._rx[n:]
+        return data
+
+# write side of the modem serial line
+class Writer:
+
+    def __init__(self, modem):
+        self.modem = modem
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+        self.modem.write(data, 9600)
+
+    async def drain(self):
+        pass
+
+# modem which sends the > prompt for AT+CMGS late, or not at all
+class LatePromptModem(fakemodem.FakeModem):
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.late = False
+
+    def _cmgs(self, args, query):
+        if not self.late:
+            return super()._cmgs(args, query)
+        number = args.strip('"')
+        self._wait = [None, lambda text: self._sms_sent(number, text)]
+        return None
+
+def modem():
+    m = LatePromptModem(latency={'+HTTPACTION': 200, '+CMGS': 50})
+    m.add_page('http://api.example.com/a', 'hello')
+    return m
+
+async def timed(phone, *args, **kw):
+    t = pyb.millis()
+    r = await phone.cmd(*args, **kw)
+    return r, pyb.elapsed_millis(t)
+
+async def expect_str(phone):
+    await phone.cmd('AT+SAPBR=1,1')
+    await phone.cmd('AT+HTTPPARA="URL","api.example.com/a"')
+    r, ms = await timed(phone, 'AT+HTTPACTION=0', 5000, expect='+HTTPACTION')
+    assert r.result == '+HTTPACTION: 0,200,5', r.result
+    assert ms < 1000, ms
+    return ms
+
+async def expect_bytes_error(phone):
+    r, ms = await timed(phone, 'AT+NOPE', 5000, expect=b'+NOPE')
+    assert r.result == 'ERROR', r.result
+    assert ms < 1000, ms
+    return ms
+
+async def expect_str_error(phone):
+    r, ms = await timed(phone, 'AT+NOPE', 5000, expect='+NOPE')
+    assert r.result == 'ERROR', r.result
+    assert ms < 1000, ms
+    return ms
+
+async def reader_alive(phone):
+    r = await phone.cmd('AT+CSQ')
+    assert r.result == 'OK' and r.response() == '+CSQ: 17,0', r.lines
+    return r.response()
+
+# URCs with a handler go to it, others to "async for"
+async def urcs(phone):
+    m = phone._reader.modem
+    seen = []
+    async def handler(line):
+        seen.append(line)
+    phone.on(b'RING', handler)
+    phone.on(b'UNDER-VOLTAGE', handler)
+    m.ring('+447700900009')
+    m.urc('UNDER-VOLTAGE POWER DOWN')
+    async def first():
+        async for line in phone:
+            return line
+    clip = await asyncio.wait_for(first(), 1)
+    assert clip == b'+CLIP: "+447700900009",145,"",0,"",0', clip
+    await asyncio.sleep(0.05)
+    assert seen == [b'RING', b'UNDER-VOLTAGE POWER DOWN'], seen
+    assert not phone._urcs, phone._urcs
+    return seen
+
+# commands issued together run one at a time, each with its own response
+async def serialised(phone):
+    rs = await asyncio.gather(phone.cmd('AT+CSQ'), phone.cmd('AT+CBC'), phone.cmd('AT+COPS?'))
+    lines = [r.lines for r in rs]
+    assert lines == [['+CSQ: 17,0'], ['+CBC: 0,80,4040'], ['+COPS: 0,0,"giffgaff"']], lines
+    assert all(r.result == 'OK' for r in rs)
+    return [r.response() for r in rs]
+
+async def send_sms(phone):
+    m = phone._reader.modem
+    mr = await phone.send_sms('+447700900001', 'Hello')
+    assert mr == 1 and m.sent[-1] == ['+447700900001', 'Hello'], (mr, m.sent)
+    return mr
+
+# message is abandoned with ESC when the prompt does not come in time
+async def prompt_timeout(phone):
+    m = phone._reader.modem
+    writer = phone._writer
+    m.late = True
+    asim800l.PROMPT_TIMEOUT, timeout = 200, asim800l.PROMPT_TIMEOUT
+    try:
+        mr = await phone.send_sms('+447700900001', 'Lost')
+    finally:
+        asim800l.PROMPT_TIMEOUT = timeout
+        m.late = False
+    assert mr is None and writer.written[-1] == b'\x1B', writer.written[-2:]
+    assert m._wait is None and not ['+447700900001', 'Lost'] in m.sent
+    return await reader_alive(phone)
+
+TESTS = (expect_str, expect_bytes_error, expect_str_error, reader_alive,
+         urcs, serialised, send_sms, prompt_timeout)
+
+async def main():
+    m = modem()
+    phone = asim800l.SIM800L(Reader(m), Writer(m))
+    reader = asyncio.ensure_future(phone.run())
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, await test(phone)))
+        assert not reader.done(), reader.exception()
+    reader.cancel()
+
+def test_asim800l():
+    asyncio.run(main())
+
+if __name__ == '__main__':
+    test_asim800l()
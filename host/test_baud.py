@@ -0,0 +1,63 @@
+# sim800l.py baud rate negotiation against a FakeModem
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_baud.py
+
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import fakemodem
+
+# modem on a line where every other AT at the given rate is garbled
+class FlakyModem(fakemodem.FakeModem):
+
+    def __init__(self, rate):
+        super().__init__(baud=9600)
+        self.scale = 0
+        self.rate = rate
+        self._probes = 0
+
+    def write(self, data, baud):
+        if baud == self.rate and self.baud == self.rate and data.strip() == b'AT':
+            self._probes += 1
+            if self._probes % 2 == 0:
+                return
+        super().write(data, baud)
+
+def negotiate(m):
+    os.chdir(tempfile.mkdtemp())
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    return phone, phone.negotiate_baud()
+
+def fastest():
+    m = fakemodem.FakeModem(baud=9600)
+    m.scale = 0
+    pyb.connect(m)
+    phone, rate = negotiate(m)
+    assert rate == 115200 and m.baud == 115200, (rate, m.baud)
+    return rate
+
+# rate which answers some probes but not all is not kept
+def unreliable():
+    m = FlakyModem(115200)
+    pyb.connect(m)
+    phone, rate = negotiate(m)
+    assert rate == 57600 and m.baud == 57600, (rate, m.baud)
+    import sim800l
+    assert phone.execute(sim800l.Command('AT\n', 300)).result == 'OK'
+    return rate
+
+TESTS = (fastest, unreliable)
+
+def test_baud():
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, test()))
+
+if __name__ == '__main__':
+    test_baud()
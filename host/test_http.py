@@ -0,0 +1,93 @@
+# sim800l.py HTTP session against a FakeModem
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_http.py
+
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import fakemodem
+
+URL = 'http://api.example.com/rates.json'
+BODY = ''.join(['{:03d} '.format(i) for i in range(100)])
+
+def modem():
+    m = fakemodem.FakeModem(latency={'+HTTPACTION': 3000, '+SAPBR': 50})
+    m.add_page(URL, BODY)
+    m.log = []
+    command = m._command
+    def logged(line):
+        m.log.append(line)
+        command(line)
+    m._command = logged
+    return m
+
+def wait(phone, done, ms=10000):
+    t = pyb.millis()
+    while not done() and pyb.elapsed_millis(t) < ms:
+        pyb.delay(1)
+        phone.poll()
+    return done()
+
+# call answered while a request waits for +HTTPACTION
+def answer_during_request(m, phone):
+    res = []
+    phone.http_get(URL, action=res.append)
+    assert wait(phone, lambda: m.log and m.log[-1].startswith('AT+HTTPACTION'))
+    t = pyb.millis()
+    phone.answer()
+    ms = pyb.elapsed_millis(t)
+    assert ms < 500, ms
+    assert wait(phone, lambda: res)
+    assert res[0].status == 200 and res[0].content == BODY.encode(), res[0].status
+    return ms
+
+# bearer dropped by the network while idle is reopened by the next request
+def reopen_dropped_bearer(m, phone):
+    assert phone.http_get(URL).status == 200
+    m.drop_bearer()
+    del m.log[:]
+    r = phone.http_post(URL, '{}')
+    assert r.status == 200, r.status
+    assert m.log.count('AT+SAPBR=1,1') == 1 and 'AT+HTTPTERM' in m.log, m.log
+    return r.status
+
+# a command which times out is an error
+def timeout_is_error(m, phone):
+    import sim800l
+    try:
+        sim800l.check_result('SAPBR 3: ', 'OK', None)
+    except sim800l.SIM800LError as err:
+        return str(err)
+    assert False, 'timeout accepted'
+
+# range of a GET is not applied to a following POST or HEAD
+def post_after_range(m, phone):
+    r = phone.http_get(URL, start=100, end=199)
+    assert r.status == 206 and r.content == BODY[100:200].encode(), r.status
+    r = phone.http_post(URL, '{}')
+    assert r.status == 200 and len(r.content) == len(BODY), (r.status, len(r.content))
+    r = phone.http_request('HEAD', URL)
+    assert r.status == 200, r.status
+    assert m._http['BREAK'] == '0' and m._http['BREAKEND'] == '0', m._http
+    return r.status
+
+TESTS = (answer_during_request, reopen_dropped_bearer, timeout_is_error, post_after_range)
+
+def test_http():
+    m = modem()
+    pyb.connect(m)
+    os.chdir(tempfile.mkdtemp())
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    phone.setup()
+    for test in TESTS:
+        print('{:24s} {}'.format(test.__name__, test(m, phone)))
+
+if __name__ == '__main__':
+    test_http()
@@ -0,0 +1,61 @@
+# sim800l.py Inbox against a FakeModem holding received, stored and sent messages
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_inbox.py
+
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import fakemodem
+
+def modem():
+    m = fakemodem.FakeModem()
+    m.scale = 0
+    m.add_sms('+447700900001', 'Hello\nsee you at 8')
+    m.add_sms('+447700900002', 'Draft', status='STO UNSENT')
+    m.add_sms('+447700900003', 'On my way', status='STO SENT')
+    m.add_sms('+447700900004', 'Thanks', status='REC READ')
+    return m
+
+# stored and sent messages have no date and time in AT+CMGL and AT+CMGR
+def load(m, phone):
+    assert phone.inbox.load() == 4
+    assert phone.inbox.slots() == [1, 2, 3, 4]
+    assert phone.inbox._headers[2] == ['+447700900002', '', '', 'STO UNSENT'], phone.inbox._headers[2]
+    assert phone.inbox._headers[1][1:] == m.sms[1][2].split(',') + ['REC UNREAD']
+    return phone.inbox.slots()
+
+def read_cached(m, phone):
+    msg = phone.inbox.read(3)
+    assert msg == ['+447700900003', '', '', 'On my way\n'], msg
+    msg = phone.inbox.read(1)
+    assert msg[0] == '+447700900001' and msg[3] == 'Hello\nsee you at 8\n', msg
+    return msg
+
+def read_from_modem(m, phone):
+    msg = phone.read_sms(2)
+    assert msg == ['+447700900002', '', '', 'Draft\n'], msg
+    assert m.sms[2][0] == 'STO UNSENT'
+    msg = phone.read_sms(4)
+    assert msg == ['+447700900004'] + m.sms[4][2].split(',') + ['Thanks\n'], msg
+    return msg
+
+TESTS = (load, read_cached, read_from_modem)
+
+def test_inbox():
+    m = modem()
+    pyb.connect(m)
+    os.chdir(tempfile.mkdtemp())
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    phone.setup()
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, test(m, phone)))
+
+if __name__ == '__main__':
+    test_inbox()
@@ -0,0 +1,64 @@
+# jsonpath.py JsonPaths against json.loads
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_jsonpath.py
+
+import os
+import sys
+import json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import jsonpath
+import json_bench
+
+DOC = {'x': {'a': 1, 'b': [10, {'c': 'deep'}], 'd': None}, 'y': [1, 2, 3], 'z': 'last'}
+
+# values of paths found in document, as JsonPaths should give them
+def expected(doc, paths):
+    values = {}
+    for p in paths:
+        v = doc
+        for k in p.split('.'):
+            if isinstance(v, dict) and k in v:
+                v = v[k]
+            elif isinstance(v, list) and k.isdigit() and int(k) < len(v):
+                v = v[int(k)]
+            else:
+                break
+        else:
+            values[p] = v
+    return values
+
+def check(body, paths):
+    want = expected(json.loads(body), paths)
+    for chunk in (len(body), 7, 1):
+        jp = jsonpath.JsonPaths(paths)
+        for i in range(0, len(body), chunk):
+            jp.feed(memoryview(body)[i:i+chunk])
+        assert jp.values == want, (paths, chunk, jp.values, want)
+    return want
+
+def disjoint():
+    return check(json.dumps(DOC).encode(), ['x.a', 'x.b.1.c', 'y.2', 'z', 'missing', 'y.9'])
+
+# a wanted path inside another wanted path is taken from the value of the outer
+def overlapping():
+    body = json.dumps(DOC).encode()
+    check(body, ['x', 'x.a', 'x.b.1.c', 'x.b.5', 'z'])
+    check(body, ['x.b.1.c', 'x.b', 'x', 'y', 'y.0'])
+    return check(body, ['y', 'y.1', 'z'])
+
+def payloads():
+    check(json_bench.currency(), json_bench.CURRENCY_PATHS)
+    return len(check(json_bench.weather(), json_bench.upyapps.WEATHER_PATHS))
+
+TESTS = (disjoint, overlapping, payloads)
+
+def test_jsonpath():
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, test()))
+
+if __name__ == '__main__':
+    test_jsonpath()
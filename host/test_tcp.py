@@ -0,0 +1,119 @@
+# sim800l.py sockets against a local echo server through the FakeModem
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_tcp.py
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import fakemodem
+
+ECHO_DELAY = 0.1    # s before server echoes, data for one socket arrives while another is read
+
+# modem which can fail AT+CIFSR
+class Modem(fakemodem.FakeModem):
+
+    cifsr_error = False
+
+    def _cifsr(self, args, query):
+        if self.cifsr_error:
+            return self._error()
+        return super()._cifsr(args, query)
+
+def echo_server():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(4)
+    def serve(conn):
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+            time.sleep(ECHO_DELAY)
+            conn.sendall(data)
+        conn.close()
+    def accept():
+        while True:
+            conn, addr = server.accept()
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+    threading.Thread(target=accept, daemon=True).start()
+    return server.getsockname()
+
+def wait(phone, done, ms=2000):
+    t = pyb.millis()
+    while not done() and pyb.elapsed_millis(t) < ms:
+        pyb.delay(1)
+        phone.poll()
+    return done()
+
+def echo(phone, addr):
+    sock = phone.socket()
+    assert sock.connect(addr)
+    assert sock.send(b'hello') == 5
+    assert wait(phone, lambda: sock.available)
+    buf = bytearray(16)
+    n = sock.recv_into(buf)
+    assert buf[:n] == b'hello', buf[:n]
+    assert sock.close()
+    return n
+
+# +CIPRXGET: 1 for one socket arrives during AT+CIPRXGET=2 for another
+def interleaved(phone, addr):
+    s0 = phone.socket()
+    s1 = phone.socket()
+    assert s0.connect(addr) and s1.connect(addr)
+    notified = []
+    s1.callback_recv(lambda s: notified.append(s.id))
+    assert s0.send(b'first') == 5
+    assert wait(phone, lambda: s0.available)
+    s1.send(b'second', action=lambda n: None)
+    buf = bytearray(16)
+    n = s0.recv_into(buf)       # echo to s1 arrives while this is answered
+    assert buf[:n] == b'first', buf[:n]
+    assert wait(phone, lambda: notified), 'data for socket 1 not announced'
+    n = s1.recv_into(buf)
+    assert buf[:n] == b'second', buf[:n]
+    s0.close()
+    s1.close()
+    return notified
+
+# failed AT+CIFSR is not taken as the address, context is set up again
+def cifsr_error(phone, addr):
+    m = phone._uart.device
+    m.cifsr_error = True
+    phone._ip = None
+    sock = phone.socket()
+    assert not sock.connect(addr)
+    assert phone._ip is None
+    sock.close()
+    m.cifsr_error = False
+    sock = phone.socket()
+    assert sock.connect(addr)
+    assert phone._ip == '10.0.0.2', phone._ip
+    sock.close()
+    return phone._ip
+
+TESTS = (echo, interleaved, cifsr_error)
+
+def test_tcp():
+    addr = echo_server()
+    # reply to AT+CIPRXGET=2 comes after the echo
+    m = Modem(latency={'+CIPRXGET': 3000 * ECHO_DELAY})
+    pyb.connect(m)
+    os.chdir(tempfile.mkdtemp())
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    phone.setup()
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, test(phone, addr)))
+
+if __name__ == '__main__':
+    test_tcp()
@@ -0,0 +1,124 @@
+# ui.py screens against the stand-in LCD160CR
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_ui.py
+
+import os
+import sys
+import random
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import lcd160cr
+import ui
+
+SCREENS = (
+    lambda lcd: ui.SendsmsScreen(lcd, ''),
+    lambda lcd: ui.DialScreen(lcd, 'Dial'),
+    lambda lcd: ui.HomeScreen(lcd, 'Home'),
+    lambda lcd: ui.SettingsScreen(lcd, 'Settings'),
+)
+
+# callbacks and widget state after each of n random touches and releases,
+# sent to widgets by Screen.check or, if every, to all as before the grid
+def dispatch(make, every, n=3000):
+    random.seed(5)
+    screen = make(lcd160cr.LCD160CR())
+    log = []
+    for i, c in enumerate(screen.checklist):
+        c.callback(lambda *args, i=i: log.append((i, args)))
+    for step in range(n):
+        t = random.random() < 0.6
+        x, y = (random.randint(0, 140), random.randint(0, 165)) if t else (0, 0)
+        if every:
+            for c in screen.checklist:
+                c.check(t, x, y)
+        else:
+            screen.check(t, x, y)
+        log.append(tuple(getattr(c, 'state', None) or getattr(c, 'selectedkey', None)
+                         for c in screen.checklist))
+    return log
+
+# grid dispatch gives the same callbacks and states as checking every widget
+def grid_dispatch():
+    calls = 0
+    for make in SCREENS:
+        log = dispatch(make, False)
+        assert log == dispatch(make, True), make(lcd160cr.LCD160CR()).__class__.__name__
+        calls += len([e for e in log if len(e) == 2 and isinstance(e[0], int)])
+    return calls
+
+# display which keeps the character written at each position of text
+class TextLCD(lcd160cr.LCD160CR):
+
+    def __init__(self):
+        super().__init__()
+        self.chars = {}
+        self._pos = (0, 0)
+
+    def set_pos(self, x, y):
+        self._pos = (x, y)
+
+    def write(self, text):
+        x, y = self._pos
+        for c in text:
+            self.chars[(x, y)] = c
+            x += ui.FONTWIDTH[1]
+        self._pos = (x, y)
+
+    def rect_interior(self, x, y, w, h):
+        self.chars = {k: c for k, c in self.chars.items()
+                      if not (x <= k[0] < x+w and y <= k[1] < y+h)}
+
+    def text(self):
+        return {k: c for k, c in self.chars.items() if not c == ' '}
+
+WORDS = ('a', 'hello', 'there', 'supercalifragilisticexpialidocious', 'x'*25, 'ok', '\n', '', '  ')
+
+def textbox(lcd):
+    screen = ui.Screen(lcd)
+    return screen, ui.Textbox(screen, 0, 40, 128, 80, ui.FG, ui.BG, '', 1, 0)
+
+# random edits of a Textbox give the same lines, and the same text on the
+# display after redraw, as laying out and drawing the text from scratch
+def textbox_layout(trials=300, edits=40):
+    random.seed(1)
+    for trial in range(trials):
+        lcd = TextLCD()
+        screen, tb = textbox(lcd)
+        screen.draw()
+        txt = ''
+        for step in range(edits):
+            op = random.random()
+            if op < 0.5:
+                txt += random.choice('abc  \nxyz')
+            elif op < 0.6:
+                txt = txt[:-1]
+            elif op < 0.8:
+                i = random.randint(0, len(txt))
+                txt = txt[:i] + random.choice(WORDS) + ' ' + txt[i:]
+            else:
+                i = random.randint(0, len(txt))
+                j = random.randint(i, len(txt))
+                txt = txt[:i] + txt[j:]
+            tb.set_text(txt)
+            screen.render()
+            fresh_lcd = TextLCD()
+            fresh = textbox(fresh_lcd)[1]
+            fresh.label = txt
+            fresh.rows = []
+            fresh.rows = fresh._layout(txt, 0)
+            assert tb.rows == fresh.rows, (txt, tb.rows, fresh.rows)
+            fresh.draw()
+            assert lcd.text() == fresh_lcd.text(), repr(txt)
+    return trials * edits
+
+TESTS = (grid_dispatch, textbox_layout)
+
+def test_ui():
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, test()))
+
+if __name__ == '__main__':
+    test_ui()
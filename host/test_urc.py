@@ -0,0 +1,91 @@
+# URCs received in the middle of command responses, run against a FakeModem
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/test_urc.py
+
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import fakemodem
+
+RING = ['RING', '+CLIP: "+447700900009",145,"",0,"",0']
+
+# modem which sends lines inside the next AT+CSQ or AT+CMGR response,
+# before response line i
+class InterleavingModem(fakemodem.FakeModem):
+
+    def __init__(self):
+        super().__init__()
+        self.scale = 0
+        self.inside = []
+        self.at = 1
+
+    def _splice(self, res):
+        res = res[:self.at] + self.inside + res[self.at:]
+        self.inside = []
+        return res
+
+    def _csq(self, args, query):
+        return self._splice(super()._csq(args, query))
+
+    def _cmgr(self, args, query):
+        return self._splice(super()._cmgr(args, query))
+
+def callbacks(phone):
+    fired = []
+    phone.callback_incoming(lambda: fired.append('incoming'))
+    phone.callback_clip(lambda: fired.append('clip ' + phone.get_clip()))
+    phone.callback_msg(lambda: fired.append('msg {}'.format(phone.get_msgid())))
+    return fired
+
+def execute(phone, cmdstr):
+    import sim800l
+    return phone.execute(sim800l.Command(cmdstr))
+
+def ring_in_csq(m, phone):
+    fired = callbacks(phone)
+    m.inside, m.at = RING, 1
+    cmd = execute(phone, 'AT+CSQ\n')
+    assert cmd.result == 'OK' and cmd.lines == ['+CSQ: 17,0'], cmd.lines
+    assert fired == ['incoming', 'clip +447700900009'], fired
+    return fired
+
+def cmti_before_csq(m, phone):
+    fired = callbacks(phone)
+    slot = m.add_sms('+447700900008', 'new')
+    m.inside, m.at = ['+CMTI: "SM",{}'.format(slot)], 0
+    assert phone.signal_strength() == 3
+    assert fired == ['msg {}'.format(slot)], fired
+    return fired
+
+def urcs_in_cmgr(m, phone):
+    fired = callbacks(phone)
+    slot = m.add_sms('+447700900001', 'Hello\nsee you at 8')
+    m.inside, m.at = RING + ['+CMTI: "SM",7'], 2
+    cmd = execute(phone, 'AT+CMGR={}\n'.format(slot))
+    assert cmd.result == 'OK' and cmd.lines[1:] == ['Hello', 'see you at 8'], cmd.lines
+    assert fired == ['incoming', 'clip +447700900009', 'msg 7'], fired
+    m.inside, m.at = RING, 1
+    msg = phone.read_sms(slot)
+    assert msg[0] == '+447700900001' and msg[3] == 'Hello\nsee you at 8\n', msg
+    return fired
+
+TESTS = (ring_in_csq, cmti_before_csq, urcs_in_cmgr)
+
+def test_urc():
+    m = InterleavingModem()
+    pyb.connect(m)
+    os.chdir(tempfile.mkdtemp())
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    phone.setup()
+    for test in TESTS:
+        print('{:20s} {}'.format(test.__name__, test(m, phone)))
+
+if __name__ == '__main__':
+    test_urc()
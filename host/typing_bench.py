@@ -0,0 +1,58 @@
+# Host benchmark of typing on the send SMS screen keyboard
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/typing_bench.py
+# Each keystroke is a touch-move across two keys, a release and the frame
+# renders, as in the phoneui main loop. Reports LCD commands per keystroke,
+# those reaching the display through CachedLCD, and keystrokes/s on the host.
+
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import lcd160cr
+import ui
+from lcdcache import CachedLCD
+
+TEXT = 'the quick brown fox jumps over the lazy dog '
+
+def main(n=400):
+    raw = lcd160cr.LCD160CR()
+    lcd = CachedLCD(raw)
+    screen = ui.SendsmsScreen(lcd, '')
+    keys = screen.keys
+    where = {}
+    for r in range(3):
+        for i in range(10):
+            where[keys.row[r][0][i]] = (i*13 + 6, keys.y + r*17 + 8)
+    screen.draw()
+
+    def frame(t, x, y):
+        screen.check(t, x, y)
+        screen.render()
+
+    issued = lcd.commands + lcd.skipped
+    sent = lcd.commands
+    start = time.perf_counter()
+    for k in range(n):
+        ch = TEXT[k % len(TEXT)]
+        if ch == ' ':
+            x, y = 64, 148      # space bar
+        else:
+            x, y = where[ch]
+            frame(True, (x + 13) % 130, y)  # finger lands on neighbour key first
+        frame(True, x, y)
+        frame(False, 0, 0)
+        if len(screen.get_msgtext()) > 100:
+            screen.clearall()
+    secs = time.perf_counter() - start
+    print('keystrokes          {}'.format(n))
+    print('commands/keystroke  {:.1f} issued, {:.1f} sent'.format(
+        (lcd.commands + lcd.skipped - issued) / n, (lcd.commands - sent) / n))
+    print('keystrokes/s        {:.0f} (host)'.format(n / secs))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+# Stand-in for MicroPython ubinascii module under CPython
+
+from binascii import *
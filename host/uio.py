@@ -0,0 +1,3 @@
+# Stand-in for MicroPython uio module under CPython
+
+from io import *
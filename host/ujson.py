@@ -0,0 +1,3 @@
+# Stand-in for MicroPython ujson module under CPython
+
+from json import *
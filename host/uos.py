@@ -0,0 +1,3 @@
+# Stand-in for MicroPython uos module under CPython
+
+from os import *
@@ -0,0 +1,110 @@
+# Host microbenchmark of lines per second framed and dispatched by SIM800L.poll
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# python3 host/urc_bench.py               stream of typical URCs and other lines
+# python3 host/urc_bench.py --log at.log  lines read from a recorded session
+# python3 host/urc_bench.py --repeat 50   times the stream is sent
+# python3 host/urc_bench.py --chunk 256   bytes received between polls
+
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+import pyb
+import atlog
+
+# received while idle: URCs, start up messages and lines with no handler
+STREAM = (
+    'RING',
+    '+CLIP: "+447700900001",145,"",0,"",0',
+    'NO CARRIER',
+    '+CMTI: "SM",3',
+    '+CUSD: 0,"Your balance is #5.00. Thank you.",15',
+    '*PSUTTZ: 2017,10,18,11,35,16,"+4",1',
+    '+CTZV: +4,1',
+    'DST: 1',
+    '+CIPRXGET: 1,0',
+    '1, CLOSED',
+    'UNDER-VOLTAGE WARNNING',
+    'UNDER-VOLTAGE POWER DOWN',
+    'Call Ready',
+    'SMS Ready',
+    '+CPIN: READY',
+    '+CFUN: 1',
+)
+
+def stream(repeat):
+    return b''.join([b'\r\n' + ln.encode() + b'\r\n' for ln in STREAM]) * repeat
+
+# bytes read from the modem in a transcript written by atlog.Recorder
+def recorded(filename, repeat):
+    data = b''
+    for entry in atlog.Replay(filename, realtime=False)._entries:
+        if entry[1] == 'r':
+            data += entry[2]
+    return data * repeat
+
+# modem sending data in chunks, as received by the UART between polls of
+# the main loop, so that URCs do not overflow the queue of the driver
+class Stream:
+
+    def __init__(self, data, chunk):
+        self.data = data
+        self.chunk = chunk
+        self.commands = 0
+        self._ready = b''
+
+    def release(self):
+        self._ready += self.data[:self.chunk]
+        self.data = self.data[self.chunk:]
+
+    def read(self):
+        data = self._ready
+        self._ready = b''
+        return data
+
+    def write(self, data, baud):
+        self.commands += 1
+
+def main(args):
+    repeat = int(args[args.index('--repeat') + 1]) if '--repeat' in args else 200
+    chunk = int(args[args.index('--chunk') + 1]) if '--chunk' in args else 128
+    if '--log' in args:
+        data = recorded(args[args.index('--log') + 1], repeat)
+    else:
+        data = stream(repeat)
+    device = Stream(data, chunk)
+    pyb.connect(device)
+    os.chdir(tempfile.mkdtemp())
+    import sim800l
+    phone = sim800l.SIM800L(4)
+    calls = {}
+    def count(key):
+        calls[key] = 0
+        def handler(line):
+            calls[key] += 1
+        return handler
+    for key in list(phone._handlers) + [b'UNDER-VOLTAGE', b'Call Ready']:
+        phone.register_urc(key, count(key))
+    lines = data.count(b'\n') // 2
+    t = pyb.millis()
+    polls = 0
+    while device.data or phone._pos < phone._len or phone._uart.any() or phone._urcs:
+        device.release()
+        phone.poll()
+        polls += 1
+    ms = max(pyb.elapsed_millis(t), 1)
+    print('{} lines {} bytes in {} ms, {} polls'.format(lines, len(data), ms, polls))
+    print('{:.0f} lines/s {:.0f} bytes/s'.format(lines * 1000 / ms, len(data) * 1000 / ms))
+    for key in sorted(calls):
+        if calls[key]:
+            print('{:20s} {}'.format(key.decode(), calls[key]))
+    if not '--log' in args:
+        assert calls[b'UNDER-VOLTAGE'] == 2 * repeat, calls[b'UNDER-VOLTAGE']
+        assert calls[b'RING'] == repeat and calls[b'1, CLOSED'] == repeat
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,3 @@
+# Stand-in for MicroPython utime module under CPython
+
+from time import *
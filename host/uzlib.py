@@ -0,0 +1,30 @@
+# Stand-in for MicroPython uzlib module under CPython
+
+import zlib
+
+def decompress(data, wbits=15, bufsize=0):
+    return zlib.decompress(data, wbits)
+
+class DecompIO:
+
+    def __init__(self, stream, wbits=15):
+        self._stream = stream
+        self._d = zlib.decompressobj(wbits)
+        self._out = b''
+
+    def read(self, n=-1):
+        while (n < 0 or len(self._out) < n) and not self._d.eof:
+            data = self._stream.read(256)
+            if not data:
+                break
+            self._out += self._d.decompress(data)
+        if n < 0:
+            n = len(self._out)
+        data = self._out[:n]
+        self._out = self._out[n:]
+        return data
+
+    def readinto(self, buf):
+        data = self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
@@ -0,0 +1,110 @@
+# Cache of HTTP responses on flash with TTL and conditional revalidation
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+import uos
+import utime
+import ujson
+from sim800l import Response
+
+CACHE_DIR = 'cache'
+CACHE_BUDGET = 16384  # bytes of cached bodies on flash
+CACHE_TTL = 600       # seconds a response is fresh unless set for its url
+
+# Install with phone.cache = HttpCache(), SIM800L.http_get then answers fresh
+# urls from flash and revalidates stale ones with If-None-Match/If-Modified-Since
+class HttpCache:
+
+    def __init__(self, directory=CACHE_DIR, budget=CACHE_BUDGET, ttl=CACHE_TTL):
+        self.directory = directory
+        self.budget = budget
+        self.ttl = ttl
+        self.ttls = {}          # url -> seconds
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._index = {}        # url -> [filename, size, expires, etag, last-modified]
+        self._lru = []          # urls, most recently used last
+        self._next = 0
+        try:
+            uos.mkdir(directory)
+        except OSError:
+            pass
+        try:
+            with open(self._path('index'), 'r') as f:
+                self._lru, self._index, self._next = ujson.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def set_ttl(self, url, seconds):
+        self.ttls[url] = seconds
+
+    def _path(self, name):
+        return '{}/{}'.format(self.directory, name)
+
+    def _save(self):
+        with open(self._path('index'), 'w') as f:
+            ujson.dump([self._lru, self._index, self._next], f)
+
+    def _read(self, url):
+        self._lru.remove(url)
+        self._lru.append(url)
+        with open(self._path(self._index[url][0]), 'rb') as f:
+            return Response(f.read(), 200)
+
+    # fresh cached response or None
+    def lookup(self, url):
+        if url in self._index and utime.time() < self._index[url][2]:
+            self.hits += 1
+            return self._read(url)
+        self.misses += 1
+        return None
+
+    # request headers with validators of stale cached response added
+    def validators(self, url, headers):
+        if not url in self._index:
+            return headers
+        hd = dict(headers) if headers else {}
+        etag, modified = self._index[url][3:5]
+        if etag and not '"' in etag:  # quote cannot be sent in AT string parameter
+            hd['If-None-Match'] = etag
+        if modified:
+            hd['If-Modified-Since'] = modified
+        return hd
+
+    # store response for url, or answer 304 Not Modified from cache
+    def update(self, url, resp):
+        if not resp:
+            return resp
+        expires = utime.time() + self.ttls.get(url, self.ttl)
+        if resp.status == 304 and url in self._index:
+            self.revalidated += 1
+            self._index[url][2] = expires
+            self._save()
+            return self._read(url)
+        if resp.status == 200 and resp.content is not None and len(resp.content) <= self.budget:
+            self._remove(url)
+            name = '{:x}'.format(self._next)
+            self._next += 1
+            with open(self._path(name), 'wb') as f:
+                f.write(resp.content)
+            self._index[url] = [name, len(resp.content), expires,
+                                resp.headers.get('etag'), resp.headers.get('last-modified')]
+            self._lru.append(url)
+            while sum([e[1] for e in self._index.values()]) > self.budget:
+                self._remove(self._lru[0])
+            self._save()
+        return resp
+
+    def _remove(self, url):
+        if url in self._index:
+            try:
+                uos.remove(self._path(self._index[url][0]))
+            except OSError:
+                pass
+            del self._index[url]
+            self._lru.remove(url)
+
+    def clear(self):
+        for url in list(self._lru):
+            self._remove(url)
+        self._save()
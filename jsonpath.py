@@ -0,0 +1,234 @@
+# Streaming extraction of selected values from a JSON document
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+import ujson
+
+# scanner modes
+VALUE  = 0  # expecting value
+KEY    = 1  # expecting key or }
+COLON  = 2  # expecting :
+AFTER  = 3  # expecting , or closing bracket
+STRING = 4  # in key or wanted string
+SCALAR = 5  # in number, true, false or null
+SKIP   = 6  # in unwanted value or wanted array/object, tracking depth
+DONE   = 7
+
+WHITESPACE = b' \t\r\n'
+SCALAR_END = b' \t\r\n,}]'
+
+# Values are found by dotted paths of keys and array indices e.g. 'rates.EUR'
+# or 'list.0.temp'. The document is fed once, whole or chunk by chunk, and only
+# the wanted values are built, so heap use does not grow with document size.
+class JsonPaths:
+
+    def __init__(self, paths):
+        self.wanted = {}
+        self.prefixes = {'': True}
+        for p in paths:
+            self.wanted[p] = True
+            parts = p.split('.')
+            for i in range(1, len(parts)):
+                self.prefixes['.'.join(parts[:i])] = True
+        self.nested = {}    # wanted path -> wanted paths inside it, taken from its value
+        for p in paths:
+            parts = p.split('.')
+            for i in range(1, len(parts)):
+                q = '.'.join(parts[:i])
+                if q in self.wanted:
+                    if not q in self.nested:
+                        self.nested[q] = []
+                    self.nested[q].append(p)
+        self.values = {}
+        self._stack = []    # [is_object, key or index] for each enclosing container
+        self._mode = VALUE
+        self._tok = None    # bytes of key or wanted value being read
+        self._target = None # path of wanted value being read, None for key
+        self._depth = 0
+        self._instr = False
+        self._esc = False
+
+    def feed(self, buf):
+        if isinstance(buf, memoryview):
+            buf = bytes(buf)
+        i = 0
+        n = len(buf)
+        while i < n:
+            m = self._mode
+            if m == SKIP:
+                i = self._skip(buf, i, n)
+            elif m == STRING:
+                i = self._string(buf, i, n)
+            elif m == SCALAR:
+                j = i
+                while j < n and not buf[j] in SCALAR_END:
+                    j += 1
+                if self._tok is not None:
+                    self._tok.extend(buf[i:j])
+                i = j
+                if j < n:
+                    self._value_done(ujson.loads(bytes(self._tok)) if self._tok is not None else None)
+            elif m == DONE:
+                break
+            else:
+                c = buf[i]
+                i += 1
+                if c in WHITESPACE:
+                    continue
+                if m == VALUE:
+                    self._start_value(c)
+                elif m == KEY:
+                    if c == 0x22:     # "
+                        self._tok = bytearray()
+                        self._target = None
+                        self._mode = STRING
+                    elif c == 0x7D:   # }
+                        self._close()
+                elif m == COLON:
+                    if c == 0x3A:     # :
+                        self._mode = VALUE
+                elif m == AFTER:
+                    if c == 0x2C:     # ,
+                        top = self._stack[-1]
+                        if top[0]:
+                            self._mode = KEY
+                        else:
+                            top[1] += 1
+                            self._mode = VALUE
+                    else:
+                        self._close()
+        return self
+
+    def _path(self):
+        return '.'.join([str(f[1]) for f in self._stack])
+
+    def _start_value(self, c):
+        if c == 0x5D and self._stack and not self._stack[-1][0]:  # ] of empty array
+            self._close()
+            return
+        path = self._path()
+        want = path in self.wanted
+        if c == 0x7B or c == 0x5B:    # { or [
+            if want:
+                self._target = path
+                self._tok = bytearray([c])
+                self._skip_from(1, False)
+            elif path in self.prefixes:
+                self._stack.append([c == 0x7B, '' if c == 0x7B else 0])
+                self._mode = KEY if c == 0x7B else VALUE
+            else:
+                self._tok = None
+                self._skip_from(1, False)
+        elif c == 0x22:               # "
+            if want:
+                self._target = path
+                self._tok = bytearray()
+                self._mode = STRING
+            else:
+                self._tok = None
+                self._skip_from(0, True)
+        else:
+            self._target = path
+            self._tok = bytearray([c]) if want else None
+            self._mode = SCALAR
+
+    def _skip_from(self, depth, instr):
+        self._depth = depth
+        self._instr = instr
+        self._esc = False
+        self._mode = SKIP
+
+    # skip (or copy if wanted) a string or container up to its end
+    def _skip(self, buf, i, n):
+        start = i
+        depth = self._depth
+        instr = self._instr
+        esc = self._esc
+        done = False
+        while i < n:
+            c = buf[i]
+            i += 1
+            if instr:
+                if esc:
+                    esc = False
+                elif c == 0x5C:   # backslash
+                    esc = True
+                elif c == 0x22:
+                    instr = False
+                    if depth == 0:
+                        done = True
+                        break
+                else:
+                    q = buf.find(b'"', i)
+                    b = buf.find(b'\\', i)
+                    j = n if q < 0 else q
+                    if 0 <= b < j:
+                        j = b
+                    i = j
+            elif c == 0x22:
+                instr = True
+            elif c == 0x7B or c == 0x5B:
+                depth += 1
+            elif c == 0x7D or c == 0x5D:
+                depth -= 1
+                if depth == 0:
+                    done = True
+                    break
+        if self._tok is not None:
+            self._tok.extend(buf[start:i])
+        self._depth = depth
+        self._instr = instr
+        self._esc = esc
+        if done:
+            self._value_done(ujson.loads(bytes(self._tok)) if self._tok is not None else None)
+        return i
+
+    # key or wanted string up to closing quote
+    def _string(self, buf, i, n):
+        j = i
+        esc = self._esc
+        while j < n:
+            c = buf[j]
+            if esc:
+                esc = False
+            elif c == 0x5C:
+                esc = True
+            elif c == 0x22:
+                break
+            j += 1
+        self._tok.extend(buf[i:j])
+        self._esc = esc
+        if j == n:
+            return j
+        s = ujson.loads(b'"' + bytes(self._tok) + b'"')
+        if self._target is None:
+            self._stack[-1][1] = s
+            self._mode = COLON
+        else:
+            self._value_done(s)
+        return j + 1
+
+    def _value_done(self, value):
+        if self._tok is not None:
+            self.values[self._target] = value
+            if self._target in self.nested:
+                self._fill(self._target, value)
+        self._tok = None
+        self._mode = AFTER if self._stack else DONE
+
+    # values of wanted paths inside the value of wanted path, absent ones are left out
+    def _fill(self, path, value):
+        for p in self.nested[path]:
+            v = value
+            for k in p[len(path)+1:].split('.'):
+                if isinstance(v, dict) and k in v:
+                    v = v[k]
+                elif isinstance(v, list) and k.isdigit() and int(k) < len(v):
+                    v = v[int(k)]
+                else:
+                    break
+            else:
+                self.values[p] = v
+
+    def _close(self):
+        self._stack.pop()
+        self._mode = AFTER if self._stack else DONE
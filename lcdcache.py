@@ -0,0 +1,119 @@
+# Wrapper for LCD160CR which only sends commands that change display state
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+# Font, pen, text colour and position are remembered so widgets can set them
+# before every draw, only changes go over the display bus. Position moves
+# after write and jpeg, all state is forgotten after set_power and set_orient.
+
+# approximate bytes on display bus for each command
+COMMAND_BYTES = {
+    'set_font': 4,
+    'set_pen': 6,
+    'set_text_color': 6,
+    'set_pos': 4,
+    'rect': 6,
+    'rect_interior': 6,
+    'erase': 2,
+    'write': 0,     # + text
+    'jpeg': 6,      # + image
+    'get_touch': 2,
+}
+DEFAULT_BYTES = 4
+
+class CachedLCD:
+
+    def __init__(self, lcd):
+        self.lcd = lcd
+        self.commands = 0   # sent to display
+        self.bytes = 0
+        self.skipped = 0    # redundant commands not sent
+        self._invalidate()
+
+    def _invalidate(self):
+        self._font = None
+        self._pen = None
+        self._color = None
+        self._pos = None
+
+    def _count(self, name, extra=0):
+        self.commands += 1
+        self.bytes += COMMAND_BYTES.get(name, DEFAULT_BYTES) + extra
+
+    def set_font(self, font, scale=0, bold=0, trans=0, scroll=0):
+        f = (font, scale, bold, trans, scroll)
+        if f == self._font:
+            self.skipped += 1
+            return
+        self._font = f
+        self._count('set_font')
+        self.lcd.set_font(font, scale, bold, trans, scroll)
+
+    def set_pen(self, line, fill):
+        if self._pen == (line, fill):
+            self.skipped += 1
+            return
+        self._pen = (line, fill)
+        self._count('set_pen')
+        self.lcd.set_pen(line, fill)
+
+    def set_text_color(self, fg, bg):
+        if self._color == (fg, bg):
+            self.skipped += 1
+            return
+        self._color = (fg, bg)
+        self._count('set_text_color')
+        self.lcd.set_text_color(fg, bg)
+
+    def set_pos(self, x, y):
+        if self._pos == (x, y):
+            self.skipped += 1
+            return
+        self._pos = (x, y)
+        self._count('set_pos')
+        self.lcd.set_pos(x, y)
+
+    def write(self, s):
+        self._pos = None
+        self._count('write', len(s))
+        self.lcd.write(s)
+
+    def jpeg(self, buf):
+        self._pos = None
+        self._count('jpeg', len(buf))
+        self.lcd.jpeg(buf)
+
+    def rect(self, x, y, w, h):
+        self._count('rect')
+        self.lcd.rect(x, y, w, h)
+
+    def rect_interior(self, x, y, w, h):
+        self._count('rect_interior')
+        self.lcd.rect_interior(x, y, w, h)
+
+    def erase(self):
+        self._count('erase')
+        self.lcd.erase()
+
+    def get_touch(self):
+        self._count('get_touch')
+        return self.lcd.get_touch()
+
+    def set_power(self, on):
+        self._invalidate()
+        self._count('set_power')
+        self.lcd.set_power(on)
+
+    def set_orient(self, orient):
+        self._invalidate()
+        self._count('set_orient')
+        self.lcd.set_orient(orient)
+
+    # other commands are passed on
+    def __getattr__(self, name):
+        attr = getattr(self.lcd, name)
+        if not callable(attr):
+            return attr
+        def command(*args, **kw):
+            self._count(name)
+            return attr(*args, **kw)
+        return command
@@ -0,0 +1,87 @@
+# Outbound SMS queue kept on flash, sent in the background with retry
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+import pyb
+import ujson
+
+OUTBOX_FILE = 'outbox.json'
+
+class Outbox:
+
+    def __init__(self, phone, filename=OUTBOX_FILE, retries=5, backoff=30000):
+        self.phone = phone
+        self.filename = filename
+        self.retries = retries  # attempts after the first before a message is dropped
+        self.backoff = backoff  # ms before first retry, doubled after each failure
+        self._msgs = []         # [destination, text, attempts]
+        self._sending = False
+        self._last = pyb.millis()
+        self._wait = 0
+        self.status = ''
+        self.status_action = None
+        try:
+            with open(self.filename) as f:
+                self._msgs = ujson.load(f)
+        except (OSError, ValueError):
+            self._msgs = []
+        if self._msgs:
+            self.status = 'OUT {}'.format(len(self._msgs))
+
+    def callback_status(self, fn):
+        self.status_action = fn
+
+    def pending(self):
+        return len(self._msgs)
+
+    def send(self, destno, msgtext):
+        self._msgs.append([destno, msgtext, 0])
+        self._save()
+        self._set_status('OUT {}'.format(len(self._msgs)))
+
+    # called each tick of main loop, sends next message when modem is idle
+    def poll(self):
+        if self._sending or not self._msgs or self.phone.busy():
+            return
+        if pyb.elapsed_millis(self._last) < self._wait:
+            return
+        self._sending = True
+        self.phone.signal_strength(self._signal)
+
+    def _signal(self, level):
+        if level > 0:
+            msg = self._msgs[0]
+            self.phone.send_sms(msg[0], msg[1], self._sent)
+        else:
+            self._sending = False
+            self._retry_after(self.backoff)    # no signal, not counted as attempt
+
+    def _sent(self, mr):
+        self._sending = False
+        msg = self._msgs[0]
+        if mr is None:
+            msg[2] += 1
+            if msg[2] > self.retries:
+                self._msgs.pop(0)
+                self._set_status('FAILED')
+                self._retry_after(0)
+            else:
+                self._set_status('RETRY {}'.format(msg[2]))
+                self._retry_after(self.backoff * (1 << (msg[2]-1)))
+        else:
+            self._msgs.pop(0)
+            self._set_status('SENT' if not self._msgs else 'OUT {}'.format(len(self._msgs)))
+            self._retry_after(0)
+        self._save()
+
+    def _retry_after(self, wait):
+        self._last = pyb.millis()
+        self._wait = wait
+
+    def _save(self):
+        with open(self.filename, 'w') as f:
+            ujson.dump(self._msgs, f)
+
+    def _set_status(self, s):
+        self.status = s
+        if self.status_action:
+            self.status_action(s)
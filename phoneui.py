@@ -9,6 +9,10 @@ import lcd160cr
 import sim800l
 import upyapps
 import gc
+from refresh import Refresh
+from outbox import Outbox
+from httpcache import HttpCache
+from lcdcache import CachedLCD
 
 phonebook = {"xxxxxxx":"+xxxxxxxxxxxx",
              "xxxxxxx":"+xxxxxxxx xxx",
@@ -22,7 +26,7 @@ national_pb = dict((v.replace('+44','0'),k) for k,v in phonebook.items())
 
 from  ui import DialScreen, CallScreen, HomeScreen, PhoneBookScreen, SettingsScreen, MessageScreen, SendsmsScreen
 
-lcd = lcd160cr.LCD160CR('Y')
+lcd = CachedLCD(lcd160cr.LCD160CR('Y'))  # only state changes reach the display
 lcd.set_orient(lcd160cr.PORTRAIT)
 dial = DialScreen(lcd, 'Dial')
 call = CallScreen(lcd, 'Calling')
@@ -34,6 +38,9 @@ sendsms = SendsmsScreen(lcd,'')
 settings = SettingsScreen(lcd, 'Settings')
 applications = upyapps.ManageAppScreen(lcd,lambda x=home: switch_to(x))
 phone = sim800l.SIM800L(4)
+phone.cache = HttpCache()
+refresh = Refresh()
+outbox = Outbox(phone)
 app = upyapps.CurrencyApp(lcd,phone,lambda x=applications: switch_to(x))
 applications.install(app,lambda x=app: switch_to(x))
 app = upyapps.WeatherApp(lcd,phone,lambda x=applications: switch_to(x))
@@ -48,11 +55,9 @@ new_sms = False
 
 
 def switch_to(screen):
-    global current, period
+    global current
     current = screen
     current.draw()
-    if current == home:
-        period = 145
 
 def docall():
     switch_to(call)
@@ -67,10 +72,12 @@ def dosms():
     msg_destination = dial.get_number()
     sendsms.set_destination(msg_destination)
 
+# message is sent in background by outbox, next one can be written at once
 def dosendsms():
-    sendsms.set_destination('  SENDING')
-    result = phone.send_sms(msg_destination, sendsms.get_msgtext())
-    sendsms.set_destination(result)
+    if sendsms.get_msgtext():
+        outbox.send(msg_destination, sendsms.get_msgtext())
+        sendsms.clearall()
+        sendsms.set_destination('  QUEUED')
     
 def set_call():
     dial.callback_call(docall)
@@ -137,11 +144,12 @@ def incoming_sms():
     id = phone.get_msgid()
     home.set_smsid(id)
     new_sms = True
+    home.render()       # show before alert, which blocks
     phone.sms_alert()
 
 def display_msg(id):
     global msg_destination, inverted_pb
-    current_msg = phone.read_sms(id)
+    current_msg = phone.inbox.read(id)
     if current_msg:
         msg_destination = current_msg[0]
         if msg_destination in inverted_pb:
@@ -156,23 +164,25 @@ def do_messages():
     global new_sms
     home.clear_sms()
     switch_to(messages)
+    if not phone.inbox.loaded:
+        phone.inbox.load()
     if new_sms:
         id = phone.get_msgid()
         new_sms =False
     else:
         id = messages.get_id()
+        if not id in phone.inbox.slots():
+            id = phone.inbox.next(0) or id
     display_msg(id)
 
 def do_msg_plus():
-    id = messages.get_id();
-    if id<65:
-        id = id+1
+    id = phone.inbox.next(messages.get_id())
+    if id:
         display_msg(id)
 
 def do_msg_minus():
-    id = messages.get_id();
-    if id>1:
-        id = id-1
+    id = phone.inbox.prev(messages.get_id())
+    if id:
         display_msg(id)
 
 def do_msg_reply():
@@ -184,21 +194,29 @@ def do_msg_reply():
 def do_msg_delete():
     id = messages.get_id()
     phone.delete_sms(id)
-    display_msg(id)
+    display_msg(phone.inbox.next(id) or phone.inbox.prev(id) or id)
+
 
+def set_status(st):
+    home.set_status(st)
+    if not st.battery is None:
+        refresh.battery = st.battery
+    if st.network == '':
+        refresh.done('network', 10000)  # not registered yet
 
-hasnetname = False
+# clock is read from local RTC, other metrics due are queried from modem
+# and the status query completes in a later tick of main loop
 def update():
-    global period
-    global hasnetname
-    home.set_date_time(phone.date_time())
-    home.set_signal_level(phone.signal_strength())
-    home.set_battery_level(phone.battery_charge())
-    if not hasnetname:
-        ns = phone.network_name()
-        if not ns == '':
-            home.set_network(ns)
-            hasnetname = True
+    due = refresh.due()
+    if 'clock' in due:
+        due.remove('clock')
+        dt = phone.date_time()
+        home.set_date_time(dt)
+        refresh.done('clock', (61 - int(dt[15:17]))*1000) # just after next minute
+    if due and not phone.busy():
+        for name in due:
+            refresh.done(name)
+        phone.status(set_status, due)
 
 def check_credit():
     phone.check_credit()
@@ -256,6 +274,9 @@ phone.callback_no_carrier(no_carrier)
 phone.callback_clip(incomingclip)
 phone.callback_msg(incoming_sms)
 phone.callback_credit_action(set_credit)
+phone.register_urc(b'+CREG', lambda line: refresh.trigger('network'))
+outbox.callback_status(home.set_outbox)
+home.set_outbox(outbox.status)
 incoming.callback_answer(answercall)
 incoming.callback_cancel(cancelcall)
 sendsms.callback_cancel(lambda x=home: switch_to(x))
@@ -268,14 +289,16 @@ phone.setup()
 usb = pyb.USB_VCP()
 
 while True:
-    phone.check_incoming()
+    phone.poll()
+    outbox.poll()
     try: 
         t,x,y = lcd.get_touch()
         current.check(t,x,y)
+        if current==home:
+            update()
+        current.render()
         if period == 0:
-            if current==home:
-                update()
-            elif current == settings:
+            if current == settings:
                 settings.set_memfree(str(gc.mem_free()))
         period =  (period + 1) % 150
         if t:
@@ -295,6 +318,7 @@ while True:
                 #wakeup         
                 count = 300
                 period = 145         
+                refresh.trigger_all()
                 lcd.set_power(1)
                 lcd.set_orient(lcd160cr.PORTRAIT)
                 lcd.set_brightness(bright_level)
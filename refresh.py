@@ -0,0 +1,48 @@
+# Tiered refresh scheduler for home screen metrics
+# MIT License; Copyright (c) 2017 Jeffrey N. Magee
+
+import pyb
+
+# refresh interval in ms for each metric, None = only when triggered
+SCHEDULE = {
+    'clock'  : 60000,
+    'signal' : 30000,
+    'battery': 300000,
+    'network': None,
+}
+STEADY = ('clock',)  # shown to the minute, interval is not backed off on low battery
+
+class Refresh:
+
+    def __init__(self, schedule=SCHEDULE, lowbattery=20, backoff=4, steady=STEADY):
+        self.schedule = schedule     # may be tuned at run time
+        self.lowbattery = lowbattery # battery % below which intervals are multiplied by backoff
+        self.backoff = backoff
+        self.steady = steady         # metrics never backed off
+        self.battery = 100
+        self._last = {}
+        self._wait = {}
+        for name in schedule:
+            self.trigger(name)
+
+    # metrics which are due for refresh
+    def due(self):
+        return [name for name in self._wait
+                if not self._wait[name] is None and pyb.elapsed_millis(self._last[name]) >= self._wait[name]]
+
+    # metric has been refreshed, next is after its interval or given delay
+    def done(self, name, delay=None):
+        wait = self.schedule[name] if delay is None else delay
+        if not wait is None and self.battery < self.lowbattery and not name in self.steady:
+            wait = wait * self.backoff
+        self._last[name] = pyb.millis()
+        self._wait[name] = wait
+
+    # refresh metric at next opportunity, e.g. on wakeup or network change
+    def trigger(self, name):
+        self._last[name] = pyb.millis()
+        self._wait[name] = 0
+
+    def trigger_all(self):
+        for name in self.schedule:
+            self.trigger(name)
@@ -8,7 +8,7 @@ import math
 # kludge required because "ignore" parameter to decode not implemented
 def convert_to_string(buf):
     try:
-        tt =  buf.decode('utf-8').strip()
+        tt =  str(buf, 'utf-8').strip()
         return tt
     except UnicodeError:
         tmp = bytearray(buf)
@@ -20,18 +20,315 @@ def convert_to_string(buf):
 class SIM800LError(Exception):
     pass
 
+# res is None if the command timed out
 def check_result(errmsg,expected,res):
-    if not res:
-        res = 'None'
-    #print(errmsg+res)
-    if not expected == res and not res == 'None':
+    if not expected == res:
         raise SIM800LError('SIM800L Error {}  {}'.format(errmsg,res))
 
 
+# final result codes which end a command
+FINAL = ('OK', 'ERROR')
+PROMPT_TIMEOUT = 5000  # ms to wait for > prompt before message text is sent
+
+URC_QUEUE_LEN = 8
+HTTP_IDLE = 60000     # ms an unused GPRS bearer and HTTP service are kept open
+BAUD_RATES = (115200, 57600, 38400, 19200, 9600)  # tried fastest first
+BAUD_FILE = 'baud.txt'  # rate chosen by negotiate_baud, used at next start
+MAX_SOCKETS = 6       # TCP connections, ids 0..5
+TCP_CHUNK = 1460      # most bytes read by one AT+CIPRXGET
+HTTP_METHODS = {'GET': 0, 'POST': 1, 'HEAD': 2}  # AT+HTTPACTION codes
+HTTP_PARAMS = {'USERDATA': '""', 'BREAK': 0, 'BREAKEND': 0}  # after AT+HTTPINIT
+HTTP_CHUNK = 512      # bytes read by each AT+HTTPREAD when streaming a body
+RESYNC = 6*3600*1000  # ms between corrections of local clock from network time
+POLL_BUDGET = 20  # ms of line processing per poll, remaining lines wait for next tick
+RX_BUF = 512      # bytes of received lines buffered, a longer line is split
+
+# day of week for pyb.RTC, 1 = Monday .. 7 = Sunday
+def weekday(y, m, d):
+    t = (0, 3, 2, 5, 0, 3, 5, 1, 4, 6, 2, 4)
+    if m < 3:
+        y -= 1
+    w = (y + y//4 - y//100 + y//400 + t[m-1] + d) % 7   # 0 = Sunday
+    return 7 if w == 0 else w
+
+def is_error(line):
+    return line[0:10] == '+CME ERROR' or line[0:10] == '+CMS ERROR'
+
+# line buf[s:e] is prefix, compared without making a string
+def starts(buf, s, e, prefix):
+    n = len(prefix)
+    if e - s < n:
+        return False
+    for i in range(n):
+        if not buf[s+i] == prefix[i]:
+            return False
+    return True
+
+# integer in field n (negative counts from end) of line buf[s:e] e.g. b'+HTTPREAD: 512'
+# or b'+CIPRXGET: 2,0,4,3', parsed without making strings
+def int_field(buf, s, e, n):
+    i = s
+    while i < e and not buf[i] == 0x3A:   # :
+        i += 1
+    if i == e:
+        i = s - 1
+    if n < 0:
+        for j in range(i+1, e):
+            if buf[j] == 0x2C:              # ,
+                n += 1
+        n += 1
+    k = 0
+    v = 0
+    neg = False
+    for j in range(i+1, e):
+        c = buf[j]
+        if c == 0x2C:
+            if k == n:
+                break
+            k += 1
+        elif k == n:
+            if c == 0x2D:                   # -
+                neg = True
+            elif 0x30 <= c <= 0x39:
+                v = v*10 + c - 0x30
+    return -v if neg else v
+
+# line is a dotted IPv4 address e.g. AT+CIFSR response
+def _is_ip(line):
+    if not line:
+        return False
+    parts = line.split('.')
+    return len(parts) == 4 and all(p.isdigit() for p in parts)
+
+# comma separated fields of line without quotes, missing fields up to n are ''
+def _fields(line, n):
+    params = [p.replace('"',' ').strip() for p in line.split(',')]
+    return params + [''] * (n - len(params))
+
+
+class Command:
+
+    def __init__(self, cmdstr, timeout=2000, action=None, msgtext=None, expect=None, raw=None, data=None):
+        self.cmdstr = cmdstr
+        self.timeout = timeout
+        self.action = action    # called with this command when complete
+        self.msgtext = msgtext  # written when > prompt is received
+        self.prompted = False
+        self.progress = None    # called with this command when msgtext has been written
+        self.expect = expect    # prefix of line which completes command instead of OK,
+                                # without cmdstr the URC awaited outside the queue
+        self.raw = raw          # prefix of line announcing length of binary data
+        self.rawfield = -1      # index of length in comma separated fields of that line
+        self.rawlen = 0
+        self.data = data        # binary data, preallocated buffer is reused if given
+        self.datalen = 0
+        self.lines = []
+        self.result = None      # final result code, None if timed out
+        self.done = False
+        self.started = 0
+
+    def response(self):
+        if self.lines:
+            return self.lines[0]
+        return self.result
+
+
+# query for each metric which may be requested from status()
+STATUS_QUERIES = {'clock':'+CCLK?', 'signal':'+CSQ', 'battery':'+CBC', 'network':'+COPS?'}
+
+class Status:
+
+    def __init__(self):     # None if not queried
+        self.date_time = None
+        self.signal = None
+        self.battery = None
+        self.network = None
+
+
+# index of stored SMS messages, headers for all slots and an LRU cache of bodies
+class Inbox:
+
+    def __init__(self, phone, cachesize=4):
+        self.phone = phone
+        self.cachesize = cachesize
+        self.loaded = False
+        self._headers = {}  # slot -> [number,date,time,status] or None if not yet read
+        self._bodies = {}   # slot -> body
+        self._lru = []      # slots in _bodies, most recently used last
+
+    # index all stored messages with one AT+CMGL, status of unread messages is not changed
+    def load(self, action=None):
+        return self.phone.query(Command('AT+CMGL="ALL",1\n',20000), self._index, action)
+
+    def _index(self, cmd):
+        self._headers = {}
+        slot = None
+        for ln in cmd.lines:
+            if ln[0:6] == '+CMGL:':
+                params = _fields(ln, 6)   # stored and sent messages have no date,time
+                slot = int(params[0][6:])
+                self._headers[slot] = [params[2], params[4], params[5], params[1]]
+                self._cache(slot, '')
+            elif not slot is None:
+                self._bodies[slot] += ln+'\n'
+        self.loaded = True
+        return len(self._headers)
+
+    def _cache(self, slot, body):
+        if slot in self._bodies:
+            self._lru.remove(slot)
+        elif len(self._lru) >= self.cachesize:
+            del self._bodies[self._lru.pop(0)]
+        self._bodies[slot] = body
+        self._lru.append(slot)
+
+    def slots(self):
+        return sorted(self._headers)
+
+    def next(self, slot):
+        for s in self.slots():
+            if s > slot:
+                return s
+        return None
+
+    def prev(self, slot):
+        for s in reversed(self.slots()):
+            if s < slot:
+                return s
+        return None
+
+    # [number,date,time,body] from index, body is read from modem if not cached
+    def read(self, slot):
+        if not slot in self._headers:
+            return None
+        hdr = self._headers[slot]
+        if hdr is None or not slot in self._bodies:
+            msg = self.phone.read_sms(slot)
+            if not msg:
+                self.deleted(slot)
+                return None
+            self._headers[slot] = msg[0:3] + ['REC READ']
+            self._cache(slot, msg[3])
+            return msg
+        self._cache(slot, self._bodies[slot])
+        return hdr[0:3] + [self._bodies[slot]]
+
+    def added(self, slot):
+        self._headers[slot] = None
+
+    def deleted(self, slot):
+        if slot in self._headers:
+            del self._headers[slot]
+        if slot in self._bodies:
+            del self._bodies[slot]
+            self._lru.remove(slot)
+
+
+# TCP connection using the modem TCP/IP stack in multi connection mode,
+# methods block unless action is given, which is then called with the result
+class Socket:
+
+    def __init__(self, phone, id):
+        self.phone = phone
+        self.id = id
+        self.connected = False
+        self.available = 0      # bytes received and waiting in modem
+        self.recv_action = None # called with socket when data arrives
+        self.close_action = None
+
+    def callback_recv(self, fn):
+        self.recv_action = fn
+
+    def callback_close(self, fn):
+        self.close_action = fn
+
+    # addr is (host, port), modem firmware may only allow ssl with one connection
+    def connect(self, addr, ssl=False, apn="giffgaff.com", action=None):
+        return self.phone.run(self.phone._tcp_connect(self, addr, ssl, apn), action)
+
+    # buf (bytes, bytearray or memoryview) is written after prompt without copying,
+    # returns number of bytes sent
+    def send(self, buf, action=None):
+        cmd = Command('AT+CIPSEND={},{}\n'.format(self.id, len(buf)), 20000, None, buf,
+                      expect='{}, SEND'.format(self.id))
+        return self.phone.query(cmd, lambda c: len(buf) if c.result == '{}, SEND OK'.format(self.id) else 0, action)
+
+    # read waiting data into buf, returns number of bytes read
+    def recv_into(self, buf, nbytes=0, action=None):
+        n = min(nbytes or len(buf), TCP_CHUNK)
+        cmd = Command('AT+CIPRXGET=2,{},{}\n'.format(self.id, n), 5000,
+                      raw='+CIPRXGET: 2', data=memoryview(buf))
+        cmd.rawfield = 2
+        return self.phone.query(cmd, self._received, action)
+
+    def _received(self, cmd):
+        for ln in cmd.lines:
+            if ln[0:12] == '+CIPRXGET: 2':
+                self.available = int(ln.split(',')[-1])
+        return cmd.datalen
+
+    def close(self, action=None):
+        self.phone._sockets.pop(self.id, None)
+        if not self.connected:
+            if action:
+                action(True)
+            return True
+        self.connected = False
+        cmd = Command('AT+CIPCLOSE={}\n'.format(self.id), 5000, expect='{}, CLOSE'.format(self.id))
+        return self.phone.query(cmd, lambda c: c.result == '{}, CLOSE OK'.format(self.id), action)
+
+
 class SIM800L:
 
     def __init__(self,uartno):  # pos =1 or 2 depending on skin position
-        self._uart = pyb.UART(uartno, 9600, read_buf_len=2048)
+        self.baud = 9600
+        try:
+            with open(BAUD_FILE) as f:
+                self.baud = int(f.read())
+        except (OSError, ValueError):
+            pass
+        self._uart = pyb.UART(uartno, self.baud, read_buf_len=2048)
+        # received bytes are read into one buffer and lines are framed by index,
+        # so no objects are made for lines that are only matched or skipped
+        self._buf = bytearray(RX_BUF)
+        self._mv = memoryview(self._buf)
+        self._pos = 0         # start of unconsumed bytes
+        self._len = 0         # end of received bytes
+        self._scan = 0        # searched for line end up to here
+        self._queue = []
+        self._current = None
+        self._urcs = []
+        self._tasks = []      # [task, action], first is running
+        self._waits = []      # commands awaiting a URC, other commands run meanwhile
+        self._unclaimed = []  # awaited URCs which arrived before their command
+        self._bearer = False  # GPRS bearer open
+        self._http = False    # HTTP service initialised
+        self._http_used = 0
+        self._params = dict(HTTP_PARAMS)  # HTTPPARA values set in HTTP service
+        self.http_idle = HTTP_IDLE
+        self.cache = None     # optional HttpCache used by http_get
+        self._ip = None       # local address once TCP/IP context is up
+        self._sockets = {}    # id -> Socket
+        self._handlers = {
+            b'RING': self._ring,
+            b'NO CARRIER': self._no_carrier,
+            b'+CLIP': self._clip_urc,
+            b'+CMTI': self._cmti,
+            b'+CUSD': self._cusd,
+            b'*PSUTTZ': self._network_time,
+            b'+CTZV': self._network_time,
+            b'+CIPRXGET': self._tcp_data,
+            b'+HTTPACTION': self._wake,
+        }
+        for n in range(MAX_SOCKETS):
+            self._handlers['{}, CLOSED'.format(n).encode()] = self._tcp_closed
+        self._urc_keys = {}   # first byte -> keys starting with it, indexed without an iterator
+        for key in self._handlers:
+            self._add_urc_key(key)
+        self._rtc = pyb.RTC()
+        self._tz = '+00'
+        self._synced = None
+        self.inbox = Inbox(self)
         self.incoming_action = None
         self.no_carrier_action = None
         self.clip_action = None
@@ -62,37 +359,336 @@ class SIM800L:
 
     def get_msgid(self):
         return self._msgid
-    
-    def command(self, cmdstr, lines=1, waitfor=500, msgtext=None):
-        #flush input
-        #print(cmdstr)
-        while self._uart.any():
-            self._uart.readchar()
-        self._uart.write(cmdstr)
-        if msgtext:
-            self._uart.write(msgtext)
-        if waitfor>1000:
-            pyb.delay(waitfor-1000)
-        buf=self._uart.readline() #discard linefeed etc
-        #print(buf)
-        buf=self._uart.readline()
-        #print(buf)
-        if not buf:
+
+    # handler is called with the line (bytes) of each URC which is prefix or starts
+    # with prefix followed by : or a space
+    def register_urc(self, prefix, handler):
+        if not prefix in self._handlers:
+            self._add_urc_key(prefix)
+        self._handlers[prefix] = handler
+
+    def _add_urc_key(self, key):
+        if not key[0] in self._urc_keys:
+            self._urc_keys[key[0]] = []
+        self._urc_keys[key[0]].append(key)
+
+    # queue command, it is written when all earlier commands have completed
+    def submit(self, cmd):
+        if cmd.cmdstr is None and cmd.expect:
+            cmd.started = pyb.millis()
+            for line in self._unclaimed:
+                if line.startswith(cmd.expect):
+                    self._unclaimed.remove(line)
+                    self._complete(cmd, line)
+                    return cmd
+            self._waits.append(cmd)
+            return cmd
+        self._queue.append(cmd)
+        if not self._current:
+            self._next()
+        return cmd
+
+    # wait for command to complete, servicing the modem meanwhile
+    def execute(self, cmd):
+        self.submit(cmd)
+        while not cmd.done:
+            pyb.delay(1)
+            self.poll()
+        return cmd
+
+    def busy(self):
+        return self._current is not None or len(self._queue) > 0 or len(self._tasks) > 0
+
+    # called each tick of main loop - never blocks
+    def poll(self):
+        start = pyb.millis()
+        self._fill()
+        buf = self._buf
+        while pyb.elapsed_millis(start) < POLL_BUDGET:
+            cmd = self._current
+            if cmd and cmd.rawlen > 0:
+                n = min(cmd.rawlen, self._len - self._pos)
+                if n == 0:
+                    if self._fill():
+                        continue
+                    break
+                cmd.data[cmd.datalen:cmd.datalen+n] = self._mv[self._pos:self._pos+n]
+                cmd.datalen += n
+                cmd.rawlen -= n
+                self._pos += n
+                self._scan = self._pos
+                continue
+            e = self._eol()
+            if e < 0:
+                if self._fill():
+                    continue
+                break
+            s = self._pos
+            self._pos = self._scan = min(e + 1, self._len)
+            while s < e and buf[s] <= 0x20:     # strip \r and spaces
+                s += 1
+            while e > s and buf[e-1] <= 0x20:
+                e -= 1
+            if s < e:
+                self._line(s, e)
+        while self._urcs and pyb.elapsed_millis(start) < POLL_BUDGET:
+            key, line = self._urcs.pop(0)
+            self._handlers[key](line)
+        for i in range(len(self._waits) - 1, -1, -1):
+            cmd = self._waits[i]
+            if pyb.elapsed_millis(cmd.started) > cmd.timeout:
+                self._waits.pop(i)
+                self._complete(cmd, None)
+        cmd = self._current
+        if cmd:
+            if cmd.msgtext and self._prompted():   # prompt has no line end
+                self._prompt()
+            elif cmd.msgtext and not cmd.prompted and pyb.elapsed_millis(cmd.started) > PROMPT_TIMEOUT:
+                self._uart.write('\x1B')     # abandon message
+                self._finish(None)
+            elif pyb.elapsed_millis(cmd.started) > cmd.timeout:
+                self._finish(None)
+        if not self._current:
+            self._next()
+        if self._bearer and not self.busy() and pyb.elapsed_millis(self._http_used) > self.http_idle:
+            self.run(self._http_close(), lambda r: None)
+
+    # read waiting bytes into end of buffer, returns number read
+    def _fill(self):
+        if self._pos == self._len:
+            self._pos = self._len = self._scan = 0
+        elif self._len == RX_BUF and self._pos > 0:  # move partial line to front
+            n = self._len - self._pos
+            self._mv[0:n] = self._mv[self._pos:self._len]
+            self._scan -= self._pos
+            self._pos = 0
+            self._len = n
+        n = min(self._uart.any(), RX_BUF - self._len)
+        if n <= 0:
+            return 0
+        n = self._uart.readinto(self._mv[self._len:self._len+n], n) or 0
+        self._len += n
+        return n
+
+    # index of next line end, a full buffer ends a line, -1 if none received
+    def _eol(self):
+        buf = self._buf
+        for i in range(self._scan, self._len):
+            if buf[i] == 0x0A:
+                return i
+        self._scan = self._len
+        if self._len == RX_BUF and self._pos == 0:
+            return self._len
+        return -1
+
+    # rest of buffer is > prompt, which is consumed
+    def _prompted(self):
+        buf = self._buf
+        found = False
+        for i in range(self._pos, self._len):
+            c = buf[i]
+            if c == 0x3E and not found:   # >
+                found = True
+            elif c > 0x20:
+                return False
+        if found:
+            self._pos = self._scan = self._len
+        return found
+
+    def _next(self):
+        if self._queue:
+            cmd = self._queue.pop(0)
+            self._current = cmd
+            cmd.started = pyb.millis()
+            if cmd.cmdstr:
+                self._uart.write(cmd.cmdstr)
+
+    # key of URC handler for line buf[s:e], None if not a URC. The key is the
+    # whole line or is followed by : or a space e.g. b'UNDER-VOLTAGE POWER DOWN'
+    def _urc_match(self, s, e):
+        buf = self._buf
+        keys = self._urc_keys.get(buf[s])
+        if keys is None:    # most response lines
             return None
-        result = convert_to_string(buf)
-        if lines>1:
-            self.savbuf = ''
-            for i in range(lines-1):
-                buf=self._uart.readline()
-                if not buf:
-                    return result
-                #print(buf)
-                buf = convert_to_string(buf)
-                if not buf == '' and not buf == 'OK':
-                    self.savbuf += buf+'\n'
-        return result
+        for j in range(len(keys)):
+            key = keys[j]
+            n = len(key)
+            if (e - s == n or (e - s > n and (buf[s+n] == 0x3A or buf[s+n] == 0x20))) and starts(buf, s, e, key):
+                return key
+        return None
+
+    def _line(self, s, e):
+        cmd = self._current
+        buf = self._buf
+        key = self._urc_match(s, e)
+        if key and not (cmd and cmd.cmdstr and key.decode() in cmd.cmdstr
+                        and (not cmd.raw or starts(buf, s, e, cmd.raw.encode()))):
+            # unsolicited unless the current command asks for that result code, a
+            # command reading data only asks for its raw line e.g. +CIPRXGET: 2
+            # and not +CIPRXGET: 1 announcing data for another socket
+            if len(self._urcs) >= URC_QUEUE_LEN:
+                self._urcs.pop(0)
+            self._urcs.append((key, bytes(self._mv[s:e])))
+            return
+        if not cmd:
+            return
+        if e - s == 2 and starts(buf, s, e, b'OK'):
+            line = 'OK'     # most frequent line, no string made
+        else:
+            line = convert_to_string(self._mv[s:e])
+        if is_error(line):
+            self._finish(line)
+        elif cmd.expect is not None:
+            if line.startswith(cmd.expect) or line == 'ERROR':
+                self._finish(line)
+            elif not line == 'OK':
+                cmd.lines.append(line)
+        elif cmd.msgtext and (line == '>' or line == 'DOWNLOAD'):  # AT+HTTPDATA prompts with DOWNLOAD
+            self._prompt()
+        elif line in FINAL:
+            self._finish(line)
+        else:
+            cmd.lines.append(line)
+            if cmd.raw and line.startswith(cmd.raw):
+                cmd.rawlen = int_field(buf, s, e, cmd.rawfield)
+                if cmd.data is None:
+                    cmd.data = bytearray(cmd.rawlen)
+
+    # command with msgtext continues after prompt, other commands have no prompt
+    def _prompt(self):
+        cmd = self._current
+        if not cmd.prompted:
+            cmd.prompted = True
+            self._uart.write(cmd.msgtext)
+            if cmd.progress:
+                cmd.progress(cmd)
+
+    def _finish(self, result):
+        cmd = self._current
+        self._current = None
+        self._complete(cmd, result)
+
+    def _complete(self, cmd, result):
+        cmd.result = result
+        cmd.done = True
+        if cmd.action:
+            cmd.action(cmd)
+
+    # drive generator which yields commands and is sent each completed command,
+    # tasks run one at a time so that their command sequences do not interleave
+    def run(self, task, action=None):
+        if action:
+            self._tasks.append([task, action])
+            if len(self._tasks) == 1:
+                self._step(None)
+        else:
+            while self._tasks and self._tasks[0][1]:    # task with action is running
+                pyb.delay(1)
+                self.poll()
+            entry = [task, None]    # listed so that busy() is true while it runs
+            self._tasks.insert(0, entry)
+            cmd = None
+            try:
+                while True:
+                    cmd = self.execute(task.send(cmd))
+            except StopIteration as e:
+                return e.value
+            finally:
+                self._tasks.remove(entry)
+                if self._tasks and self._tasks[0][1]:  # started while this one ran
+                    self._step(None)
+
+    def _step(self, cmd):
+        task, action = self._tasks[0]
+        try:
+            nxt = task.send(cmd)
+        except StopIteration as e:
+            self._tasks.pop(0)
+            action(e.value)
+            if self._tasks:
+                self._step(None)
+            return
+        except Exception:
+            self._tasks.pop(0)
+            raise
+        nxt.action = self._step
+        self.submit(nxt)
+
+    # issue query, blocking unless action is given, which is then called with result
+    def query(self, cmd, parse, action=None):
+        if action:
+            cmd.action = lambda c: action(parse(c))
+            self.submit(cmd)
+        else:
+            return parse(self.execute(cmd))
     
+    def command(self, cmdstr, timeout=2000, msgtext=None):
+        cmd = self.execute(Command(cmdstr, timeout, None, msgtext))
+        self.savbuf = ''
+        for ln in cmd.lines[1:]:
+            self.savbuf += ln+'\n'
+        return cmd.response()
+    
+    def _set_baud(self, rate):
+        self._uart.init(rate, read_buf_len=2048)
+        self._pos = self._len = self._scan = 0
+        self.baud = rate
+
+    # modem answers AT at current rate
+    def _alive(self, tries=1):
+        for i in range(tries):
+            if self.execute(Command('AT\n',300)).result == 'OK':
+                return True
+        return False
+
+    # modem answers every one of n ATs at current rate
+    def _verified(self, n):
+        for i in range(n):
+            if not self.execute(Command('AT\n',300)).result == 'OK':
+                return False
+        return True
+
+    # find rate the modem is using, None if it does not answer
+    def _probe(self):
+        for rate in (self.baud,) + BAUD_RATES:
+            self._set_baud(rate)
+            if self._alive(2):
+                return rate
+        return None
+
+    # switch modem (AT+IPR) and UART to fastest rate which verifies, falling back if it fails
+    def negotiate_baud(self, rates=BAUD_RATES):
+        current = self._probe()
+        if current is None:
+            self._set_baud(9600)
+            return self.baud
+        for rate in rates:
+            if rate <= current:
+                break
+            if not self.execute(Command('AT+IPR={}\n'.format(rate))).result == 'OK':
+                continue
+            pyb.delay(100)
+            self._set_baud(rate)
+            if self._verified(3):
+                current = rate
+                break
+            # modem may not have switched, find it and restore previous rate
+            self._set_baud(current)
+            found = self._probe()
+            if found and not found == current:
+                self.execute(Command('AT+IPR={}\n'.format(current)))
+                pyb.delay(100)
+            self._set_baud(current)
+        self.command('AT&W\n')         # keep rate in modem profile
+        try:
+            with open(BAUD_FILE, 'w') as f:
+                f.write(str(self.baud))
+        except OSError:
+            pass
+        return self.baud
+
     def setup(self):
+        self.negotiate_baud()
         self.command('ATE0\n')         # command echo off
         self.command('AT+CRSL=99\n')   # ringer level
         self.command('AT+CMIC=0,10\n') # microphone gain
@@ -101,12 +697,16 @@ class SIM800L:
         self.command('AT+CALS=3,0\n')  # set ringtone
         self.command('AT+CLTS=1\n')    # enabke get local timestamp mode
         self.command('AT+CSCLK=0\n')   # disable automatic sleep
+        self.command('AT+CREG=1\n')    # report network registration changes
+        self.sync_clock()
         
     def wakechars(self):
         self._uart.write('AT\n')        # will be ignored
         pyb.delay(100)
     
     def sleep(self,n):
+        if n and self._bearer:
+            self.run(self._http_close())
         self.command('AT+CSCLK={}\n'.format(n))
             
     def sms_alert(self):
@@ -127,62 +727,38 @@ class SIM800L:
         if (vol>=0 and vol<=100):
             self.command('AT+CLVL={}\n'.format(vol))
     
-    def signal_strength(self):
-        result = self.command('AT+CSQ\n',3)
-        if result:
-            params=result.split(',')
-            if not params[0] == '':
-                params2 = params[0].split(':')
-                if params2[0]=='+CSQ':
-                    x = int(params2[1])
-                    if not x == 99:
-                        return(math.floor(x/6+0.5))
-        return 0
+    def signal_strength(self, action=None):
+        return self.query(Command('AT+CSQ\n'), lambda c: _signal(c.response()), action)
         
-    def battery_charge(self):   
-        result = self.command('AT+CBC\n',3,1500)
-        if result:
-            params=result.split(',')
-            if not params[0] == '':
-                params2 = params[0].split(':')
-                if params2[0]=='+CBC':
-                    return int(params[1])
-        return 0
+    def battery_charge(self, action=None):
+        return self.query(Command('AT+CBC\n',3000), lambda c: _battery(c.response()), action)
         
-    def network_name(self):   
-        result = self.command('AT+COPS?\n',3)
-        if result:
-            params=result.split(',')
-            if not params[0] == '':
-                params2 = params[0].split(':')
-                if params2[0]=='+COPS':
-                    if len(params)>2:
-                        names = params[2].split('"')
-                        if len(names)>1:
-                            return names[1]
-        return ''
-
+    def network_name(self, action=None):
+        return self.query(Command('AT+COPS?\n'), lambda c: _network(c.response()), action)
 
     def read_sms(self,id):
-        result = self.command('AT+CMGR={}\n'.format(id),99)
+        cmd = self.execute(Command('AT+CMGR={}\n'.format(id)))
+        result = cmd.response()
         if result:
-            params=result.split(',')
+            params=_fields(result, 5)
             if not params[0] == '':
                 params2 = params[0].split(':')
                 if params2[0]=='+CMGR':
-                    number = params[1].replace('"',' ').strip()
-                    date   = params[3].replace('"',' ').strip()
-                    time   = params[4].replace('"',' ').strip()
-                    return  [number,date,time,self.savbuf]
+                    number = params[1]
+                    date   = params[3]
+                    time   = params[4]
+                    body = ''
+                    for ln in cmd.lines[1:]:
+                        body += ln+'\n'
+                    return  [number,date,time,body]
         return None
     
-    def send_sms(self,destno,msgtext):
-        result = self.command('AT+CMGS="{}"\n'.format(destno),99,5000,msgtext+'\x1A')
-        if result and result=='>' and self.savbuf:
-            params = self.savbuf.split(':')
-            if params[0]=='+CUSD' or params[0] == '+CMGS':
-                return 'OK'
-        return 'ERROR'
+    # message reference number or None if sending failed,
+    # progress is called when the text has been written after the prompt
+    def send_sms(self,destno,msgtext, action=None, progress=None):
+        cmd = Command('AT+CMGS="{}"\n'.format(destno),60000,None,msgtext+'\x1A')
+        cmd.progress = progress
+        return self.query(cmd, _sms_sent, action)
     
     def check_credit(self):
         self.command('AT+CUSD=1,"*100#"\n')
@@ -191,97 +767,307 @@ class SIM800L:
         return self.credit
     
     def delete_sms(self,id):
-        self.command('AT+CMGD={}\n'.format(id),1)
+        self.command('AT+CMGD={}\n'.format(id))
+        self.inbox.deleted(id)
                      
+    # set local RTC from modem clock
+    def sync_clock(self, action=None):
+        self._synced = pyb.millis()
+        return self.query(Command('AT+CCLK?\n'), lambda c: self._set_rtc(_date_time(c.response())), action)
+
+    def _set_rtc(self, dt):
+        if dt:
+            y, m, d = int(dt[0:2])+2000, int(dt[3:5]), int(dt[6:8])
+            self._rtc.datetime((y, m, d, weekday(y, m, d), int(dt[9:11]), int(dt[12:14]), int(dt[15:17]), 0))
+            self._tz = dt[17:]
+        return dt
+
+    # time from local RTC in same format as AT+CCLK, no modem traffic
     def date_time(self):
-        result = self.command('AT+CCLK?\n',3)
-        if result:
-            if result[0:5] == "+CCLK":
-                return result.split('"')[1]
-        return ''
+        if self._synced is None or pyb.elapsed_millis(self._synced) > RESYNC:
+            self.sync_clock(lambda dt: None)
+        y, m, d, wd, hh, mm, ss, sub = self._rtc.datetime()
+        return '{:02d}/{:02d}/{:02d},{:02d}:{:02d}:{:02d}{}'.format(y%100, m, d, hh, mm, ss, self._tz)
+
+    # requested metrics (keys of STATUS_QUERIES) in one round trip
+    def status(self, action=None, what=('clock','signal','battery')):
+        cmdstr = 'AT' + ';'.join([STATUS_QUERIES[w] for w in what])
+        return self.query(Command(cmdstr+'\n',3000), _status, action)
         
-    def check_incoming(self): 
-        if self._uart.any():
-            buf=self._uart.readline()
-            # print(buf)
-            buf = convert_to_string(buf)
-            params=buf.split(',')
-            if params[0] == "RING":
-                if self.incoming_action:
-                    self.incoming_action()
-            elif params[0][0:5] == "+CLIP":
-                params2 = params[0].split('"')
-                self._clip = params2[1]
-                if self.clip_action:
-                    self.clip_action()
-            elif params[0][0:5] == "+CMTI":
-                self._msgid = int(params[1])
-                if self.msg_action:
-                    self.msg_action()
-            elif params[0][0:5] == "+CUSD":
-                if len(params)>1:
-                    st = params[1].find('#')
-                    en = params[1].find('.',st)
-                    en = params[1].find('.',en+1)
-                    if st>0 and en>0:
-                        self.credit = '£'+params[1][st+1:en]
-                        if self.credit_action:
-                            self.credit_action()
-            elif params[0] == "NO CARRIER":
-                    self.no_carrier_action()
-
-
-    # http get command using gprs
-    def http_get(self,url,apn="giffgaff.com"):
-        resp = None
-        rstate = 0
+    # unsolicited result code handlers
+
+    # URC completes the command awaiting it, or is kept until that is submitted
+    def _wake(self, line):
+        line = convert_to_string(line)
+        for cmd in self._waits:
+            if line.startswith(cmd.expect):
+                self._waits.remove(cmd)
+                self._complete(cmd, line)
+                return
+        if len(self._unclaimed) >= URC_QUEUE_LEN:
+            self._unclaimed.pop(0)
+        self._unclaimed.append(line)
+
+    def _ring(self, line):
+        if self.incoming_action:
+            self.incoming_action()
+
+    def _no_carrier(self, line):
+        if self.no_carrier_action:
+            self.no_carrier_action()
+
+    def _clip_urc(self, line):
+        st = line.find(b'"')
+        en = line.find(b'"', st+1)
+        if st > 0 and en > 0:
+            self._clip = line[st+1:en].decode()
+            if self.clip_action:
+                self.clip_action()
+
+    def _cmti(self, line):
+        self._msgid = int(line[line.rfind(b',')+1:])
+        self.inbox.added(self._msgid)
+        if self.msg_action:
+            self.msg_action()
+
+    def _network_time(self, line):
+        self.sync_clock(lambda dt: None)
+
+    def _cusd(self, line):
+        params = convert_to_string(line).split(',')
+        if len(params)>1:
+            st = params[1].find('#')
+            en = params[1].find('.',st)
+            en = params[1].find('.',en+1)
+            if st>0 and en>0:
+                self.credit = '£'+params[1][st+1:en]
+                if self.credit_action:
+                    self.credit_action()
+
+
+    # new unconnected Socket
+    def socket(self):
+        for n in range(MAX_SOCKETS):
+            if not n in self._sockets:
+                self._sockets[n] = Socket(self, n)
+                return self._sockets[n]
+        raise SIM800LError('SIM800L Error no free socket')
+
+    def _tcp_connect(self, sock, addr, ssl, apn):
+        try:
+            if not self._ip:
+                cmd = yield Command('AT+CIPMUX=1\n')
+                check_result("CIPMUX: ",'OK',cmd.result)
+                cmd = yield Command('AT+CIPRXGET=1\n')   # data is read with AT+CIPRXGET=2
+                check_result("CIPRXGET: ",'OK',cmd.result)
+                cmd = yield Command('AT+CSTT="{}"\n'.format(apn))
+                check_result("CSTT: ",'OK',cmd.result)
+                cmd = yield Command('AT+CIICR\n',85000)
+                check_result("CIICR: ",'OK',cmd.result)
+                cmd = yield Command('AT+CIFSR\n',2000,expect='')  # address is only response
+                if not _is_ip(cmd.result):
+                    raise SIM800LError('SIM800L Error CIFSR: {}'.format(cmd.result))
+                self._ip = cmd.result
+            cmd = yield Command('AT+CIPSSL={}\n'.format(1 if ssl else 0))
+            check_result("CIPSSL: ",'OK',cmd.result)
+            cmd = yield Command('AT+CIPSTART={},"TCP","{}",{}\n'.format(sock.id, addr[0], addr[1]),
+                                75000, expect='{}, '.format(sock.id))
+            sock.connected = cmd.result in ('{}, CONNECT OK'.format(sock.id), '{}, ALREADY CONNECT'.format(sock.id))
+        except SIM800LError as err:
+            print(str(err))
+            self._ip = None
+        return sock.connected
+
+    def _tcp_data(self, line):      # +CIPRXGET: 1,<id>
+        id = int(line[line.rfind(b',')+1:])
+        if id in self._sockets:
+            sock = self._sockets[id]
+            sock.available = max(sock.available, 1)
+            if sock.recv_action:
+                sock.recv_action(sock)
+
+    def _tcp_closed(self, line):    # <id>, CLOSED
+        id = int(line[0:line.find(b',')])
+        if id in self._sockets:
+            sock = self._sockets[id]
+            sock.connected = False
+            if sock.close_action:
+                sock.close_action(sock)
+
+    # http get command using gprs, non-blocking if action is given.
+    # If consumer (function or generator) is given the body is passed to it in
+    # chunks read into one buffer, otherwise it is returned in Response.content.
+    # headers is a dict of extra request headers, response headers are read if head is true
+    def http_get(self,url,apn="giffgaff.com",action=None,consumer=None,chunksize=HTTP_CHUNK,headers=None,head=False,
+                 start=0,end=0,retries=0,compressed=False):
+        if compressed:  # body is inflated as it is passed on, so headers are needed for Content-Encoding
+            headers = dict(headers) if headers else {}
+            headers['Accept-Encoding'] = 'gzip, deflate'
+            head = True
+        if self.cache and not consumer and not start and not end:
+            resp = self.cache.lookup(url)
+            if resp:
+                if action:
+                    action(resp)
+                return resp
+            headers = self.cache.validators(url, headers)
+            task = self._http_request('GET',url,apn,None,chunksize,headers,True,None,None,0,0,0)
+            if action:
+                return self.run(task, lambda r: action(self.cache.update(url, r)))
+            return self.cache.update(url, self.run(task))
+        return self.http_request('GET',url,apn,action,consumer,chunksize,headers,head,start=start,end=end,retries=retries)
+
+    def http_post(self,url,body,content_type='application/json',apn="giffgaff.com",action=None,headers=None,head=False):
+        return self.http_request('POST',url,apn,action,None,HTTP_CHUNK,headers,head,body,content_type)
+
+    # method is GET, POST or HEAD, body (str or bytes) is uploaded with AT+HTTPDATA.
+    # GET from byte start (to end if nonzero) uses HTTPPARA BREAK/BREAKEND, and
+    # with a consumer a broken transfer is resumed from the last byte received
+    # up to retries times.
+    def http_request(self,method,url,apn="giffgaff.com",action=None,consumer=None,chunksize=HTTP_CHUNK,headers=None,
+                     head=False,body=None,content_type=None,start=0,end=0,retries=0):
+        task = self._http_request(method,url,apn,consumer,chunksize,headers,head,body,content_type,start,end,retries)
+        return self.run(task,action)
+
+    def _http_open(self,apn):
+        if not self._bearer:
+            # open bearer context
+            cmd = yield Command('AT+SAPBR=3,1,"Contype","GPRS"\n')
+            check_result("SAPBR 1: ",'OK',cmd.result)
+            cmd = yield Command('AT+SAPBR=3,1,"APN","{}"\n'.format(apn))
+            check_result("SAPBR 2: ",'OK',cmd.result)
+            cmd = yield Command('AT+SAPBR=1,1\n',30000)
+            check_result("SAPBR 3: ",'OK',cmd.result)
+            self._bearer = True
+        if not self._http:
+            cmd = yield Command('AT+HTTPINIT\n')
+            check_result("HTTPINIT: ",'OK',cmd.result)
+            cmd = yield Command('AT+HTTPPARA="CID",1\n')
+            check_result("HTTPPARA 1: ",'OK',cmd.result)
+            self._http = True
+
+    # HTTP service parameter, only sent when changed
+    def _http_para(self,name,value):
+        if not self._params.get(name) == value:
+            cmd = yield Command('AT+HTTPPARA="{}",{}\n'.format(name,value))
+            check_result("HTTPPARA {}: ".format(name),'OK',cmd.result)
+            self._params[name] = value
+
+    def _http_request(self,method,url,apn,consumer,chunksize,headers,head,body,content_type,start,end,retries):
+        if not method in HTTP_METHODS:
+            raise ValueError("Unsupported method: " + method)
         proto, dummy, surl = url.split("/", 2)
         is_ssl = 0
         if  proto == "http:":
             is_ssl = 0
         elif proto == "https:":
-            is_ssl == 1
+            is_ssl = 1
         else:
             raise ValueError("Unsupported protocol: " + proto)
-        try:
-            # open bearer context
-            res = self.command('AT+SAPBR=3,1,"Contype","GPRS"\n')
-            check_result("SAPBR 1: ",'OK',res)
-            res = self.command('AT+SAPBR=3,1,"APN","{}"\n'.format(apn))
-            check_result("SAPBR 2: ",'OK',res)
-            res = self.command('AT+SAPBR=1,1\n',1,2000)
-            check_result("SAPBR 3: ",'OK',res)
-            # now do http request
-            res = self.command('AT+HTTPINIT\n',1)
-            check_result("HTTPINIT: ",'OK',res)
-            res = self.command('AT+HTTPPARA="CID",1\n')
-            check_result("HTTPPARA 1: ",'OK',res)
-            res = self.command('AT+HTTPPARA="URL","{}"\n'.format(surl))
-            check_result("HTTPPARA 2: ",'OK',res)
-            res = self.command('AT+HTTPSSL={}\n'.format(is_ssl))
-            check_result("HTTPSSL: ",'OK',res)
-            res = self.command('AT+HTTPACTION=0\n')
-            check_result("HTTPACTION: ",'OK',res)
-            for i in range(20):  #limit wait to max 20 x readline timeout
-                buf = self._uart.readline()
-                if buf and not buf==b'\r\n':
-                    buf = convert_to_string(buf)
-                    #print(buf)
-                    prefix,retcode,bytes = buf.split(',')
-                    rstate = int(retcode)
-                    nbytes = int(bytes)
-                    break
-            res = self.command('AT+HTTPREAD\n',1)
-            buf = self._uart.read(nbytes)
-            check_result("HTTPACTION: ",'+HTTPREAD: {}'.format(nbytes),res)
-            if buf[-4:] == b'OK\r\n':  # remove final OK if it was read
-                buf = buf[:-4]
-            resp = Response(buf)
-        except SIM800LError as err:
-            print(str(err))
-        self.command('AT+HTTPTERM\n',1) # terminate HTTP task
-        self.command('AT+SAPBR=0,1\n',1) # close Bearer context
-        return resp
+        userdata = ''
+        if headers:
+            userdata = '\\r\\n'.join(['{}: {}'.format(k,v) for k,v in headers.items()])
+        if isinstance(body, str):
+            body = body.encode()
+        if consumer and hasattr(consumer, 'send'):
+            next(consumer)
+        received = start    # next byte wanted, a retry starts from here
+        packed = bytearray()  # compressed body
+        attempt = 0
+        reopened = False
+        while True:
+            resp = None
+            rstate = 0
+            error = False
+            self._http_used = pyb.millis()
+            reused = self._bearer and self._http
+            try:
+                yield from self._http_open(apn)
+                # now do http request
+                cmd = yield Command('AT+HTTPPARA="URL","{}"\n'.format(surl))
+                check_result("HTTPPARA 2: ",'OK',cmd.result)
+                cmd = yield Command('AT+HTTPSSL={}\n'.format(is_ssl))
+                check_result("HTTPSSL: ",'OK',cmd.result)
+                yield from self._http_para('USERDATA','"{}"'.format(userdata))
+                # zero for both is whole body, the range of an earlier GET stays set
+                # in the HTTP service so it is cleared for other methods
+                yield from self._http_para('BREAK',received if method == 'GET' else 0)
+                yield from self._http_para('BREAKEND',end if method == 'GET' else 0)
+                if not body is None:
+                    if content_type:
+                        yield from self._http_para('CONTENT','"{}"'.format(content_type))
+                    cmd = yield Command('AT+HTTPDATA={},{}\n'.format(len(body),10000),20000,None,body)
+                    check_result("HTTPDATA: ",'OK',cmd.result)
+                # modem answers OK at once and +HTTPACTION when the request is
+                # done, commands such as ATA are not held up meanwhile
+                self._unclaimed = []
+                cmd = yield Command('AT+HTTPACTION={}\n'.format(HTTP_METHODS[method]))
+                check_result("HTTPACTION: ",'OK',cmd.result)
+                cmd = yield Command(None,60000,expect='+HTTPACTION')
+                if not cmd.result or not cmd.result.startswith('+HTTPACTION'):
+                    raise SIM800LError('SIM800L Error HTTPACTION: {}'.format(cmd.result))
+                prefix,retcode,nbytes = cmd.result.split(',')
+                rstate = int(retcode)
+                nbytes = int(nbytes)
+                rheaders = {}
+                if head or method == 'HEAD':
+                    cmd = yield Command('AT+HTTPHEAD\n',10000,raw='+HTTPHEAD')
+                    check_result("HTTPHEAD: ",'OK',cmd.result)
+                    if cmd.data:
+                        rheaders = _headers(cmd.data[:cmd.datalen])
+                if method == 'HEAD':
+                    resp = Response(None, rstate, rheaders)
+                elif consumer:
+                    coding = _coding(rheaders)
+                    buf = bytearray(chunksize)
+                    offset = 0
+                    while offset < nbytes:
+                        cmd = yield Command('AT+HTTPREAD={},{}\n'.format(offset,chunksize),20000,raw='+HTTPREAD',data=buf)
+                        check_result("HTTPREAD: ",'OK',cmd.result)
+                        if cmd.datalen == 0:
+                            break
+                        if coding:      # compressed body is much smaller, inflated when complete
+                            packed.extend(memoryview(buf)[:cmd.datalen])
+                        else:
+                            _feed(consumer, memoryview(buf)[:cmd.datalen])
+                        offset += cmd.datalen
+                        if rstate < 300:
+                            received += cmd.datalen
+                    if offset < nbytes:
+                        raise SIM800LError('SIM800L Error HTTPREAD: {} of {}'.format(offset,nbytes))
+                    resp = Response(None, rstate, rheaders)
+                    resp.compressed_size = received - start
+                    if coding:
+                        resp.size = _inflate(packed, coding, lambda c: _feed(consumer, c), buf)
+                    else:
+                        resp.size = resp.compressed_size
+                else:
+                    cmd = yield Command('AT+HTTPREAD\n',20000,raw='+HTTPREAD')
+                    check_result("HTTPREAD: ",'OK',cmd.result)
+                    data = cmd.data if cmd.data else b''
+                    if cmd.datalen < len(data):
+                        data = data[:cmd.datalen]
+                    resp = Response(data, rstate, rheaders)
+            except SIM800LError as err:
+                print(str(err))
+                error = True
+            self._http_used = pyb.millis()
+            if error or rstate >= 600:   # start again with next request
+                yield from self._http_close()
+                if reused and not reopened:     # network may drop an idle bearer
+                    reopened = True
+                    continue
+            if not (consumer and method == 'GET' and (error or rstate >= 600)) or attempt >= retries:
+                return resp
+            attempt += 1
+
+    # session is closed when idle, before sleep or after an error
+    def _http_close(self):
+        self._bearer = False
+        self._http = False
+        self._params = dict(HTTP_PARAMS)
+        yield Command('AT+HTTPTERM\n') # terminate HTTP task
+        yield Command('AT+SAPBR=0,1\n') # close Bearer context
 
 
     def test(self):
@@ -289,21 +1075,129 @@ class SIM800L:
         print(r.text)
 
 
-    
+# response header block to dict with lower case names
+def _headers(buf):
+    hd = {}
+    for ln in convert_to_string(buf).split('\n'):
+        i = ln.find(':')
+        if i > 0:
+            hd[ln[:i].strip().lower()] = ln[i+1:].strip()
+    return hd
+
+# gzip or deflate Content-Encoding of response, None if not compressed
+def _coding(headers):
+    coding = headers.get('content-encoding')
+    if coding in ('gzip', 'deflate'):
+        return coding
+    return None
+
+# pass compressed data to consumer as inflated chunks of up to len(buf) bytes,
+# returns inflated size
+def _inflate(data, coding, consumer, buf):
+    import uio
+    stream = uio.BytesIO(data)
+    try:
+        import deflate
+        d = deflate.DeflateIO(stream, deflate.GZIP if coding == 'gzip' else deflate.ZLIB)
+    except ImportError:
+        import uzlib
+        d = uzlib.DecompIO(stream, 31 if coding == 'gzip' else 15)
+    size = 0
+    mv = memoryview(buf)
+    while True:
+        n = d.readinto(buf)
+        if not n:
+            return size
+        consumer(mv[:n])
+        size += n
+
+def _feed(consumer, chunk):
+    if hasattr(consumer, 'send'):
+        consumer.send(chunk)
+    else:
+        consumer(chunk)
+
+def _signal(result):
+    if result:
+        params=result.split(',')
+        if not params[0] == '':
+            params2 = params[0].split(':')
+            if params2[0]=='+CSQ':
+                x = int(params2[1])
+                if not x == 99:
+                    return(math.floor(x/6+0.5))
+    return 0
+
+def _battery(result):
+    if result:
+        params=result.split(',')
+        if not params[0] == '':
+            params2 = params[0].split(':')
+            if params2[0]=='+CBC':
+                return int(params[1])
+    return 0
+
+def _network(result):
+    if result:
+        params=result.split(',')
+        if not params[0] == '':
+            params2 = params[0].split(':')
+            if params2[0]=='+COPS':
+                if len(params)>2:
+                    names = params[2].split('"')
+                    if len(names)>1:
+                        return names[1]
+    return ''
+
+def _date_time(result):
+    if result:
+        if result[0:5] == "+CCLK":
+            return result.split('"')[1]
+    return ''
+
+def _status(cmd):
+    st = Status()
+    for ln in cmd.lines:
+        if ln[0:5] == '+CCLK':
+            st.date_time = _date_time(ln)
+        elif ln[0:4] == '+CSQ':
+            st.signal = _signal(ln)
+        elif ln[0:4] == '+CBC':
+            st.battery = _battery(ln)
+        elif ln[0:5] == '+COPS':
+            st.network = _network(ln)
+    return st
+
+def _sms_sent(cmd):
+    if cmd.result == 'OK':
+        for ln in cmd.lines:
+            if ln[0:6] == '+CMGS:':
+                return int(ln[6:])
+    return None
+
  
  
 class Response:
     
-    def __init__(self, buf, status = 200):
+    def __init__(self, buf, status = 200, headers = None):
         self.encoding = "utf-8"
         self._cached = buf
         self.status = status
+        self.headers = headers if headers else {}
+        self._coding = _coding(self.headers) if buf is not None else None
+        self.compressed_size = len(buf) if buf is not None else 0  # bytes transferred
+        self.size = None if self._coding else self.compressed_size   # None until inflated
     
     def close(self):
         self._cached = None
     
     @property
     def content(self):
+        if self._coding:
+            body = bytearray()
+            self.size = _inflate(self._cached, self._coding, body.extend, bytearray(HTTP_CHUNK))
+            self._cached = body
+            self._coding = None
         return self._cached
     
     @property
@@ -314,3 +1208,12 @@ class Response:
         import ujson
         return ujson.loads(self.content)
 
+    # dict of values at dotted paths e.g. 'rates.EUR', scanning body once
+    # and inflating a compressed body chunk by chunk
+    def extract(self, paths):
+        import jsonpath
+        jp = jsonpath.JsonPaths(paths)
+        if self._coding:
+            self.size = _inflate(self._cached, self._coding, jp.feed, bytearray(HTTP_CHUNK))
+            return jp.values
+        return jp.feed(self.content).values
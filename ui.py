@@ -17,12 +17,15 @@ BG = BLACK
 FONTHEIGHT = [5, 8, 8, 14]
 FONTWIDTH  = [4, 6, 6, 9]
 
+GRID = 32   # size of cells in screen index of touchable widgets
+
 
 
 class Button:
 
     def __init__(self, screen, x, y, w, h, fg, bg, label, font = 3, bold = 1):
          self.lcd = screen.lcd
+         self.screen = screen
          screen.actionable(self)
          self.x = x 
          self.y = y
@@ -39,11 +42,11 @@ class Button:
     def callback(self, fn):
         self.action =fn
 
-    def draw(self, pressed=False):
+    def draw(self):
         self.lcd.set_font(self.font,0,self.bold,0)
         self.lcd.set_pos(self.x+ self.w//2 - (len(self.label)*FONTWIDTH[self.font])//2,                     
                          self.y + self.h//2 -FONTHEIGHT[self.font]//2)
-        if not pressed:
+        if not self.state:
             self.lcd.set_pen(self.bg, self.bg)
             self.lcd.set_text_color(self.fg, self.bg)
         else:
@@ -56,24 +59,26 @@ class Button:
         if touched and x > self.x and x < self.x + self.w and y > self.y and y < self.y + self.h:
             if not self.state:
                 self.state = True
-                self.draw(True)
+                self.screen.invalidate(self)
         else:
             if self.state:
                 self.state = False
-                self.draw(False)
+                self.screen.invalidate(self)
                 if self.action:
                     self.action()
 
 
     def set_background(self,color):
-        self.bg = color
-        self.draw()
+        if not color == self.bg:
+            self.bg = color
+            self.screen.invalidate(self)
 
 
 class Label:
 
     def __init__(self, screen, x, y, w, h, fg, bg, label, font = 3, bold = 1, centred = True):
          self.lcd = screen.lcd
+         self.screen = screen
          screen.drawable(self)
          self.x = x 
          self.y = y
@@ -100,17 +105,22 @@ class Label:
         self.lcd.write(self.label)
 
     def set_background(self,color):
-        self.bg = color
+        if not color == self.bg:
+            self.bg = color
+            self.screen.invalidate(self)
 
     def set_text(self,txt):
-        self.label = txt[:self.width]
-        self.draw()
+        txt = txt[:self.width]
+        if not txt == self.label:
+            self.label = txt
+            self.screen.invalidate(self)
 
 
 class Textbox:
     
     def __init__(self, screen, x, y, w, h, fg, bg, label, font = 3, bold = 1):
         self.lcd = screen.lcd
+        self.screen = screen
         screen.drawable(self)
         self.x = x
         self.y = y
@@ -123,44 +133,104 @@ class Textbox:
         self.lines = h // FONTHEIGHT[font]
         self.label = label[:self.width]
         self.bold = bold
+        self.rows = []      # (start, end, next start or None) of each wrapped line in label
+        self.rows = self._layout(self.label, 0)
+        self.shown = []     # text of each line as drawn
+
+    # end of line starting at text[a] and start of next line, None if no more text.
+    # Words are wrapped, a word longer than the box is split.
+    def _row(self, text, a):
+        n = len(text)
+        i = a
+        pos = 0
+        while True:
+            j = i
+            while j < n and not text[j] == ' ' and not text[j] == '\n':
+                j += 1
+            if pos > 0 and pos + j - i > self.width:
+                return i, i
+            if pos == 0 and j - i > self.width:
+                return i + self.width, i + self.width
+            pos += j - i + 1
+            if j >= n:
+                return n, None
+            if text[j] == '\n':
+                return j, j + 1
+            i = j + 1
+
+    # wrapped lines of text, reusing lines before k from current layout
+    def _layout(self, text, k):
+        rows = self.rows[:k]
+        a = self.rows[k][0] if k < len(self.rows) else 0
+        while not a is None and len(rows) < self.lines:
+            b, a2 = self._row(text, a)
+            rows.append((a, b, a2))
+            a = a2
+        return rows
+
+    def _text(self, r):
+        if r < len(self.rows):
+            return self.label[self.rows[r][0]:self.rows[r][1]][:self.width]
+        return ''
+
+    def _draw_line(self, r, txt):
+        self.lcd.set_pos(self.x, self.y+r*FONTHEIGHT[self.font])
+        self.lcd.write(txt)
 
     def draw(self):
         self.lcd.set_font(self.font,0,self.bold,0)
         self.lcd.set_pen(self.fg, self.bg)
         self.lcd.set_text_color(self.fg, self.bg)
         self.lcd.rect_interior(self.x, self.y, self.w, self.h)
-        curline = 0; pos = 0
-        wlines = self.label.split('\n')
-        for ln in range(len(wlines)):
-            words = wlines[ln].split(' ')
-            for wn in range(len(words)):
-                if pos + len(words[wn]) > self.width:
-                    pos = 0; curline = curline +1
-                    if curline >= self.lines:
-                        return
-                    while len(words[wn]) > self.width:
-                        self.lcd.set_pos(self.x, self.y+curline*8)
-                        self.lcd.write(words[wn][:self.width])
-                        words[wn] = words[wn][self.width:]
-                        curline = curline +1
-                        if curline >= self.lines:
-                            return
-                self.lcd.set_pos(self.x + pos*FONTWIDTH[self.font], self.y+curline*FONTHEIGHT[self.font])
-                self.lcd.write(words[wn]+' ')
-                pos = pos + len(words[wn])+1
-            pos = 0; curline = curline +1
-            if curline >= self.lines:
-                return
-
+        self.shown = []
+        for r in range(len(self.rows)):
+            txt = self._text(r)
+            self.shown.append(txt)
+            if txt:
+                self._draw_line(r, txt)
+
+    # repaint only lines whose text has changed, padding over old text
+    def redraw(self):
+        self.lcd.set_font(self.font,0,self.bold,0)
+        self.lcd.set_text_color(self.fg, self.bg)
+        n = max(len(self.rows), len(self.shown))
+        while len(self.shown) < n:
+            self.shown.append('')
+        for r in range(n):
+            txt = self._text(r)
+            old = self.shown[r]
+            if not txt == old:
+                self._draw_line(r, txt + ' '*(len(old) - len(txt)))
+                self.shown[r] = txt
+        del self.shown[len(self.rows):]
+
+    # lines are wrapped again from the line before the first edited character,
+    # typing or deleting at the end only rewraps the last lines
     def set_text(self,txt):
+        if txt == self.label:
+            return
+        old = self.label
+        if txt.startswith(old):
+            p = len(old)
+        elif old.startswith(txt):
+            p = len(txt)
+        else:
+            p = 0
+            while p < len(txt) and p < len(old) and txt[p] == old[p]:
+                p += 1
+        k = len(self.rows) - 1
+        while k > 0 and self.rows[k][0] > p:
+            k -= 1
         self.label = txt
-        self.draw() 
+        self.rows = self._layout(txt, max(0, k-1))
+        self.screen.invalidate(self)
 
 class Image:
 
     def __init__(self, screen, x, y, w, h, jpegimage):
          self.lcd = screen.lcd
          self.bg = screen.bg
+         self.screen = screen
          screen.drawable(self)
          self.x = x 
          self.y = y
@@ -177,24 +247,25 @@ class Image:
             self.lcd.rect(self.x, self.y, self.w, self.h)
             
     def set_image(self,im):
-        self.jpegimage = im
-        self.draw()
+        if not im is self.jpegimage:
+            self.jpegimage = im
+            self.screen.invalidate(self)
         
          
 class SignalLevel:
 
     def __init__(self, screen,level = 0):
         screen.drawable(self)
+        self.screen = screen
         self.level = level
         self.lcd = screen.lcd
-        self.draw()
         
     def set_level(self, level):
         if level<0 or level>5:
             return
         if not level == self.level:
             self.level = level
-            self.draw()
+            self.screen.invalidate(self)
             
     def draw(self):
         for i in range(5):
@@ -209,16 +280,16 @@ class BatteryLevel:
 
     def __init__(self,screen, level = 0):
         screen.drawable(self)
+        self.screen = screen
         self.level = level
         self.lcd = screen.lcd
-        self.draw()
         
     def set_level(self, level):
         if level<0 or level>100:
             return
         if not level == self.level:
             self.level = level
-            self.draw()
+            self.screen.invalidate(self)
             
     def draw(self):
         self.lcd.set_pen(WHITE, WHITE)
@@ -237,37 +308,62 @@ class Keys():
 
     def __init__(self,screen,y):
         screen.actionable(self)
+        self.screen = screen
         self.lcd = screen.lcd
+        self.x = 0
         self.y = y
+        self.w = 130
+        self.h = 51
         self.shiftlevel = 0  # 0 = lowercase, 1= uppercase, 2 = numeric
         self.selectedkey = None
+        self.selected = None # (row, index) of selected key
+        self.pending = []    # (row, index) of keys to repaint
         self.action = None
         self.row = [['qwertyuiop','QWERTYUIOP','1234567890'],
                     ['asdfghjkl;','ASDFGHJKL:','@#£&*()\'"_'],
                     ['`zxcvbnm,.','~ZXCVBNM!?','%-+=/;:<>^']]
 
     def set_shiftlevel(self,level):
+        old = self.shiftlevel
         if self.shiftlevel == level:
             self.shiftlevel = 0
         else:
             self.shiftlevel = level
-        self.draw()
+        for r in range(3):
+            for i in range(10):
+                if not self.row[r][old][i] == self.row[r][self.shiftlevel][i]:
+                    self._repaint((r,i))
 
     def callback(self, fn):
         self.action =fn
 
+    def _repaint(self, pos):
+        if not pos in self.pending:
+            self.pending.append(pos)
+            self.screen.invalidate(self)
+
+    def _draw_key(self, r, i):
+        self.lcd.set_pos(i*13,self.y+r*17)
+        key = self.row[r][self.shiftlevel][i]
+        if not (r,i) == self.selected:
+            self.lcd.set_text_color(WHITE, GREY)
+        else:
+            self.lcd.set_text_color(BLACK, WHITE)
+        self.lcd.write(key)
+
     def draw(self):
         self.lcd.set_font(3)
         for r in range(3):
             for i in range(10):
-                self.lcd.set_text_color(WHITE, GREY)
-                self.lcd.set_pos(i*13,self.y+r*17)
-                key = self.row[r][self.shiftlevel][i]
-                if not key == self.selectedkey:
-                    self.lcd.set_text_color(WHITE, GREY)
-                else:
-                    self.lcd.set_text_color(BLACK, WHITE)
-                self.lcd.write(key)
+                self._draw_key(r, i)
+        self.pending = []
+
+    # repaint only keys which have changed
+    def redraw(self):
+        self.lcd.set_font(3)
+        for r, i in self.pending:
+            self._draw_key(r, i)
+        self.pending = []
 
     def check(self,touched, x,y):
         if touched and  y > self.y and y < self.y + 51:
@@ -276,13 +372,17 @@ class Keys():
             if rowindex>=0 and rowindex<3 and keyindex<10:
                 key = self.row[rowindex][self.shiftlevel][keyindex]
                 if not key == self.selectedkey:
+                    if self.selected:
+                        self._repaint(self.selected)
                     self.selectedkey = key
-                    self.draw()
+                    self.selected = (rowindex,keyindex)
+                    self._repaint(self.selected)
         else:
             if self.selectedkey:
                 key = self.selectedkey
+                self._repaint(self.selected)
                 self.selectedkey = None
-                self.draw()
+                self.selected = None
                 if self.action:
                     self.action(key)
                     
@@ -322,12 +422,18 @@ class SetLevel():
             self.action(self.val)
 
 
+# Widgets do not draw when changed but mark themselves dirty with invalidate,
+# render then redraws each dirty widget once per frame. Only draw, used when
+# switching to the screen, erases the whole LCD.
 class Screen():
 
     def __init__(self,lcd,fg=WHITE, bg=BLACK):
         self.lcd = lcd
         self.drawlist = []
         self.checklist = []
+        self.dirty = []
+        self.grid = None    # cell -> touchable widgets, built at first touch
+        self.active = []    # widgets sent the last touch, they get the release
         self.fg = fg
         self.bg = bg
         
@@ -336,14 +442,54 @@ class Screen():
         self.lcd.erase()
         for d in self.drawlist:
             d.draw()
+        self.dirty = []
+
+    def invalidate(self, obj):
+        if not obj in self.dirty:
+            self.dirty.append(obj)
+
+    # redraw dirty widgets in drawing order, called each frame for current screen
+    def render(self):
+        if self.dirty:
+            dirty = self.dirty
+            self.dirty = []
+            for d in self.drawlist:
+                if d in dirty:
+                    if hasattr(d, 'redraw'):    # widget can repaint just what changed
+                        d.redraw()
+                    else:
+                        d.draw()
    
+    # touch goes to widgets in its grid cell and those touched last time,
+    # release only to those touched last time
     def check(self, t, x, y):
-        for c in self.checklist:
+        if t:
+            if self.grid is None:
+                self._index()
+            cell = self.grid.get((x//GRID, y//GRID), ())
+            targets = self.active + [c for c in cell if not c in self.active]
+            self.active = targets
+        elif self.active:
+            targets = self.active
+            self.active = []
+        else:
+            return
+        for c in targets:
             c.check(t, x, y)
+
+    def _index(self):
+        self.grid = {}
+        for c in self.checklist:
+            for i in range(c.x//GRID, (c.x+c.w)//GRID + 1):
+                for j in range(c.y//GRID, (c.y+c.h)//GRID + 1):
+                    if not (i,j) in self.grid:
+                        self.grid[(i,j)] = []
+                    self.grid[(i,j)].append(c)
             
     def actionable(self, obj):
         self.drawlist.append(obj)
         self.checklist.append(obj)
+        self.grid = None
         
     def drawable(self, obj):
         self.drawlist.append(obj)
@@ -436,6 +582,7 @@ class HomeScreen(Screen):
         self.time = Label(self,0,40,128,10,FG,BG,'')
         self.date = Label(self,40,55,50,10,FG,BG,'',1)
         self.smsid  = Label(self,40,70,50,10,FG,BG,'',1)
+        self.outbox = Label(self,92,70,36,10,FG,BG,'',1)
         self.call = Button(self,0,85,30,30,FG,BLUE,'CAL')
         self.sms = Button(self,48,85,30,30,FG,BLUE,'SMS')
         self.app = Button(self,95,85,30,30,FG,BLUE,'APP')
@@ -478,6 +625,18 @@ class HomeScreen(Screen):
     def set_network(self,label):
         self.network.set_text(label)
 
+    def set_status(self,st):
+        self.set_date_time(st.date_time)
+        if not st.signal is None:
+            self.set_signal_level(st.signal)
+        if not st.battery is None:
+            self.set_battery_level(st.battery)
+        if st.network:
+            self.network.set_text(st.network)
+
+    def set_outbox(self,label):
+        self.outbox.set_text(label)
+
     def set_smsid(self,id):
         self.message.set_background(GREEN)
         self.smsid.set_background(GREEN)
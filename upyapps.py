@@ -38,16 +38,20 @@ class CurrencyApp(AppScreen):
         
     def do_update(self):
         self.status.set_text('Fetching..')
-        r = self.phone.http_get("https://v3.exchangerate-api.com/bulk/** your API KEY ***/GBP")
+        self.phone.http_get("https://v3.exchangerate-api.com/bulk/** your API KEY ***/GBP", action=self.show, compressed=True)
+
+    def show(self, r):
         if r and r.status==200:
-            eur = '{:4.3f}'.format(r.json()['rates']['EUR'])
-            usd = '{:4.3f}'.format(r.json()['rates']['USD'])
-            chf = '{:4.3f}'.format(r.json()['rates']['CHF'])
+            rates = r.extract(['rates.EUR', 'rates.USD', 'rates.CHF'])
+            eur = '{:4.3f}'.format(rates['rates.EUR'])
+            usd = '{:4.3f}'.format(rates['rates.USD'])
+            chf = '{:4.3f}'.format(rates['rates.CHF'])
             self.euro.set_text  ('Euro       : {}'.format(eur))
             self.dollar.set_text('US Dollar  : {}'.format(usd ))
             self.swiss.set_text('Swiss Franc: {}'.format(chf))
         self.status.set_text('')
-        r.close()
+        if r:
+            r.close()
                                
         
 icontofile = {
@@ -65,6 +69,22 @@ icontofile = {
     "tstorms":"tstorms"
 }
         
+WEATHER_PATHS = [
+    'current_observation.weather',
+    'current_observation.display_location.city',
+    'current_observation.display_location.country',
+    'current_observation.temp_c',
+    'current_observation.relative_humidity',
+    'current_observation.pressure_mb',
+    'current_observation.wind_mph',
+    'current_observation.wind_dir',
+    'current_observation.icon',
+    'moon_phase.sunrise.hour',
+    'moon_phase.sunrise.minute',
+    'moon_phase.sunset.hour',
+    'moon_phase.sunset.minute'
+]
+
 class WeatherApp(AppScreen):
 
     def __init__(self, lcd, phone, backfn, label = 'Weather'):  
@@ -89,22 +109,24 @@ class WeatherApp(AppScreen):
  
     def do_update(self,place):
         self.weather.set_text('fetching..')
-        r = self.phone.http_get('http://api.wunderground.com/api/** your API KEY ***/conditions/astronomy/q/{}.json'.format(place))
-        dd=r.json()
+        self.phone.http_get('http://api.wunderground.com/api/** your API KEY ***/conditions/astronomy/q/{}.json'.format(place), action=self.show, compressed=True)
+
+    def show(self, r):
         if r and r.status == 200:
-            self.weather.set_text('{}'.format(dd['current_observation']['weather']))
-            self.city.set_text('{}, {}'.format(dd['current_observation']['display_location']['city'],
-                                               dd['current_observation']['display_location']['country'],))
-            self.temperature.set_text('{}C'.format(dd['current_observation']['temp_c']))
-            self.humidity.set_text('{}'.format(dd['current_observation']['relative_humidity']))
-            self.pressure.set_text('{}mb'.format(dd['current_observation']['pressure_mb']))
-            self.wind.set_text('{}mph {}'.format(int(dd['current_observation']['wind_mph']),
-                                       dd['current_observation']['wind_dir']))
-            self.sunrise.set_text('Sunrise {}:{}'.format(dd['moon_phase']['sunrise']['hour'],
-                                                         dd['moon_phase']['sunrise']['minute']))
-            self.sunset.set_text('Sunset {}:{}'.format(dd['moon_phase']['sunset']['hour'],
-                                                       dd['moon_phase']['sunset']['minute']))
-            iconname =  dd['current_observation']['icon']
+            dd = r.extract(WEATHER_PATHS)
+            self.weather.set_text('{}'.format(dd['current_observation.weather']))
+            self.city.set_text('{}, {}'.format(dd['current_observation.display_location.city'],
+                                               dd['current_observation.display_location.country'],))
+            self.temperature.set_text('{}C'.format(dd['current_observation.temp_c']))
+            self.humidity.set_text('{}'.format(dd['current_observation.relative_humidity']))
+            self.pressure.set_text('{}mb'.format(dd['current_observation.pressure_mb']))
+            self.wind.set_text('{}mph {}'.format(int(dd['current_observation.wind_mph']),
+                                       dd['current_observation.wind_dir']))
+            self.sunrise.set_text('Sunrise {}:{}'.format(dd['moon_phase.sunrise.hour'],
+                                                         dd['moon_phase.sunrise.minute']))
+            self.sunset.set_text('Sunset {}:{}'.format(dd['moon_phase.sunset.hour'],
+                                                       dd['moon_phase.sunset.minute']))
+            iconname =  dd['current_observation.icon']
             with open('icons/{}.jpg'.format(icontofile[iconname]), 'rb') as f:
                 buf = f.read()       
             self.icon.set_image(buf)